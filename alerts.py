@@ -0,0 +1,353 @@
+# alerts.py
+#
+# Daily due-date alerts. A sweep finds staff whose PME / GR-SR / Tech Ref /
+# Gradation date falls in the next N days, skips items already alerted,
+# groups the rest per (CLI, bill unit) and sends one message per group.
+#
+# Settings (environment):
+#   HRMS_ALERTS=0                  disable the in-process scheduler
+#   HRMS_ALERT_DAYS=30             look-ahead window
+#   HRMS_ALERT_HOUR=7              local hour of the daily sweep
+#   HRMS_ALERT_SENDER=file|smtp    default: file
+#   HRMS_ALERT_OUTBOX=<dir>        file sender target (default ./alerts_outbox)
+#   HRMS_ALERT_SMTP_HOST / _PORT   SMTP server (default localhost:25)
+#   HRMS_ALERT_FROM                sender address
+#   HRMS_ALERT_TO                  default recipients, comma separated
+#   HRMS_ALERT_RECIPIENTS_FILE     JSON {"<cli name>": ["a@x", ...]}
+#
+# For local testing, run a debugging SMTP server and point the sender at it:
+#   python -m aiosmtpd -n -l localhost:1025
+#   HRMS_ALERT_SENDER=smtp HRMS_ALERT_SMTP_PORT=1025 ...
+
+import json
+import logging
+import os
+import smtplib
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models import AlertLog, Staff
+
+log = logging.getLogger("hrms.alerts")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ALERT_DAYS = int(os.environ.get("HRMS_ALERT_DAYS", "30"))
+ALERT_HOUR = int(os.environ.get("HRMS_ALERT_HOUR", "7"))
+
+# Staff column -> label, same wording as the reports page
+DUE_FIELDS = {
+    "pme_due": "PME Due",
+    "gr_sr_due": "GR/SR Due",
+    "tech_ref_due": "Tech Ref Due",
+    "date_of_gradation": "Gradation Due",
+}
+
+
+# ------------------- SWEEP -------------------
+
+def find_due(db, today, days):
+    """
+    Items due in [today, today + days] with no alert_log entry yet.
+    One range query per due field, each served by that field's index;
+    already-sent items are removed by an anti-join on alert_log.
+    """
+    until = today + timedelta(days=days)
+    items = []
+
+    for field in DUE_FIELDS:
+        column = getattr(Staff, field)
+        rows = (
+            db.query(
+                Staff.pf_no, Staff.name, Staff.designation,
+                Staff.cli_name, Staff.bill_unit, column,
+            )
+            .outerjoin(AlertLog, and_(
+                AlertLog.pf_no == Staff.pf_no,
+                AlertLog.due_field == field,
+                AlertLog.due_date == column,
+            ))
+            .filter(column.between(today, until), AlertLog.id.is_(None))
+            .all()
+        )
+        for pf_no, name, designation, cli_name, bill_unit, due_date in rows:
+            items.append({
+                "pf_no": pf_no,
+                "name": name,
+                "designation": designation,
+                "cli_name": cli_name or "",
+                "bill_unit": bill_unit or "",
+                "due_field": field,
+                "due_date": due_date,
+            })
+
+    return items
+
+
+def group_items(items):
+    groups = defaultdict(list)
+    for item in items:
+        groups[(item["cli_name"], item["bill_unit"])].append(item)
+    for group in groups.values():
+        group.sort(key=lambda i: (i["due_date"], i["pf_no"]))
+    return dict(sorted(groups.items()))
+
+
+def format_message(cli_name, bill_unit, items, days):
+    lines = [
+        f"Due-date alert for CLI: {cli_name or '-'}, Bill Unit: {bill_unit or '-'}",
+        f"Items due in the next {days} days: {len(items)}",
+        "",
+        f"{'Due Date':<12}{'Item':<15}{'PF No':<14}{'Name':<28}Designation",
+    ]
+    for i in items:
+        lines.append(
+            f"{i['due_date'].strftime('%d.%m.%Y'):<12}"
+            f"{DUE_FIELDS[i['due_field']]:<15}"
+            f"{i['pf_no']:<14}"
+            f"{(i['name'] or '')[:27]:<28}"
+            f"{i['designation'] or ''}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _item_key(item):
+    return item["pf_no"], item["due_field"], item["due_date"]
+
+
+def claim_items(db, items, claimed_at):
+    """
+    Record items in alert_log before they are sent. Every worker runs
+    the scheduler, and the unique (pf_no, due_field, due_date) lets only
+    one of them claim an item. Returns the items this sweep now owns;
+    items another sweep claimed first are left out.
+    """
+    for _ in range(2):
+        db.add_all([
+            AlertLog(
+                pf_no=i["pf_no"],
+                due_field=i["due_field"],
+                due_date=i["due_date"],
+                sent_at=claimed_at,
+            )
+            for i in items
+        ])
+        try:
+            db.commit()
+            return items
+        except IntegrityError:
+            db.rollback()
+
+        # Someone else got part of the group: keep the rest and retry.
+        taken = set(
+            db.query(AlertLog.pf_no, AlertLog.due_field, AlertLog.due_date)
+            .filter(AlertLog.pf_no.in_({i["pf_no"] for i in items}))
+            .all()
+        )
+        items = [i for i in items if _item_key(i) not in taken]
+        if not items:
+            return []
+
+    return []
+
+
+def release_items(db, items, claimed_at):
+    """
+    Undo claim_items after a failed send, so the next sweep retries.
+    """
+    db.query(AlertLog).filter(
+        AlertLog.pf_no.in_({i["pf_no"] for i in items}),
+        AlertLog.sent_at == claimed_at,
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def run_sweep(sender=None, days=ALERT_DAYS, today=None):
+    """
+    One sweep. Each group is claimed in alert_log before it is sent and
+    released again if the send fails, so concurrent sweeps never send an
+    item twice and a failed send is retried by the next sweep. An error
+    in one group is logged and the other groups still go out.
+    """
+    sender = sender or default_sender()
+    today = today or date.today()
+    summary = {"items": 0, "groups": 0, "failed": 0}
+
+    db = SessionLocal()
+    try:
+        groups = group_items(find_due(db, today, days))
+
+        with sender:
+            for (cli_name, bill_unit), items in groups.items():
+                claimed_at = datetime.now()
+                try:
+                    items = claim_items(db, items, claimed_at)
+                except Exception:
+                    db.rollback()
+                    log.exception("Alert for %s / %s not claimed", cli_name, bill_unit)
+                    summary["failed"] += 1
+                    continue
+                if not items:
+                    continue
+
+                body = format_message(cli_name, bill_unit, items, days)
+                subject = f"HRMS due-date alert: {cli_name or '-'} / {bill_unit or '-'} ({len(items)})"
+                try:
+                    sender.send(cli_name, bill_unit, subject, body)
+                except Exception:
+                    log.exception("Alert for %s / %s not sent", cli_name, bill_unit)
+                    summary["failed"] += 1
+                    try:
+                        release_items(db, items, claimed_at)
+                    except Exception:
+                        db.rollback()
+                        log.exception("Claim for %s / %s not released", cli_name, bill_unit)
+                    continue
+
+                summary["items"] += len(items)
+                summary["groups"] += 1
+    finally:
+        db.close()
+
+    log.info("Alert sweep: %s", summary)
+    return summary
+
+
+# ------------------- SENDERS -------------------
+
+class FileSender:
+    """
+    Writes each message to <outbox>/<date>_<cli>_<bill unit>.txt.
+    """
+
+    def __init__(self, outbox=None):
+        self.outbox = outbox or os.environ.get(
+            "HRMS_ALERT_OUTBOX", os.path.join(BASE_DIR, "alerts_outbox")
+        )
+
+    def __enter__(self):
+        os.makedirs(self.outbox, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, cli_name, bill_unit, subject, body):
+        safe = "".join(c if c.isalnum() else "-" for c in f"{cli_name}_{bill_unit}")
+        path = os.path.join(self.outbox, f"{date.today().isoformat()}_{safe}.txt")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"Subject: {subject}\n\n{body}\n")
+
+
+class SmtpSender:
+    """
+    One SMTP connection per sweep; one message per group. Recipients come
+    from HRMS_ALERT_RECIPIENTS_FILE per CLI, falling back to HRMS_ALERT_TO.
+    """
+
+    def __init__(self, host=None, port=None, from_addr=None):
+        self.host = host or os.environ.get("HRMS_ALERT_SMTP_HOST", "localhost")
+        self.port = int(port or os.environ.get("HRMS_ALERT_SMTP_PORT", "25"))
+        self.from_addr = from_addr or os.environ.get("HRMS_ALERT_FROM", "hrms@localhost")
+        self.default_to = [
+            a.strip() for a in os.environ.get("HRMS_ALERT_TO", "").split(",") if a.strip()
+        ]
+        self.recipients = {}
+        recipients_file = os.environ.get("HRMS_ALERT_RECIPIENTS_FILE")
+        if recipients_file:
+            with open(recipients_file, encoding="utf-8") as f:
+                self.recipients = json.load(f)
+        self.smtp = None
+
+    def __enter__(self):
+        self.smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPException:
+            pass
+        self.smtp = None
+        return False
+
+    def send(self, cli_name, bill_unit, subject, body):
+        to = self.recipients.get(cli_name) or self.default_to
+        if not to:
+            raise ValueError(f"No recipients for CLI {cli_name!r}")
+
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.from_addr
+        message["To"] = ", ".join(to)
+        message.set_content(body)
+        self.smtp.send_message(message)
+
+
+def default_sender():
+    if os.environ.get("HRMS_ALERT_SENDER", "file") == "smtp":
+        return SmtpSender()
+    return FileSender()
+
+
+# ------------------- SCHEDULER -------------------
+
+class AlertScheduler:
+    """
+    Background thread running one sweep a day at ALERT_HOUR. If the app
+    starts after that hour the day's sweep runs right away; alert_log
+    makes repeated sweeps on the same day cheap no-ops.
+    """
+
+    def __init__(self, hour=ALERT_HOUR):
+        self.hour = hour
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _next_run(self, now):
+        run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        return run if run > now else run + timedelta(days=1)
+
+    def _loop(self):
+        if datetime.now().hour >= self.hour:
+            self._sweep()
+
+        while not self._stop.is_set():
+            now = datetime.now()
+            if self._stop.wait((self._next_run(now) - now).total_seconds()):
+                break
+            self._sweep()
+
+    def _sweep(self):
+        try:
+            run_sweep()
+        except Exception:
+            log.exception("Alert sweep failed")
+
+    def start(self):
+        # Re-armed on every start: stop() leaves the event set.
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="hrms-alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+scheduler = AlertScheduler()
+
+
+if __name__ == "__main__":
+    # python alerts.py [days]   -> run one sweep now
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    print(run_sweep(days=int(sys.argv[1]) if len(sys.argv) > 1 else ALERT_DAYS))
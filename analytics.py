@@ -0,0 +1,418 @@
+# analytics.py
+#
+# Columnar copy of staff and leave_records for the /analytics reports.
+# Both tables are exported to Parquet under ANALYTICS_DIR and queried
+# with DuckDB, so the aggregations never scan the OLTP database.
+#
+# A snapshot is brought up to date before each query, table by table:
+#   staff          rewritten when its table token (http_cache) changed
+#   leave_records  append-only in this app: rows above the last exported
+#                  id go into a new part file; any other change (or too
+#                  many parts) rewrites the table
+#
+# duckdb and pandas are imported on first use, like the other heavy
+# dependencies in main.py.
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy import Date, Integer, func
+
+from alerts import DUE_FIELDS
+from database import SessionLocal
+from http_cache import cached_page, table_version
+from models import Leave, Staff
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYTICS_DIR = os.environ.get("HRMS_ANALYTICS_DIR", os.path.join(BASE_DIR, "analytics"))
+
+MAX_LEAVE_PARTS = 32          # compact leave_records after this many appends
+
+# Bump when the Parquet layout or column types change: older snapshots
+# are then discarded instead of being mixed with new part files.
+SNAPSHOT_FORMAT = 3
+
+STAFF_COLUMNS = [
+    "pf_no", "name", "designation", "cli_name", "bill_unit",
+    "date_of_joining", "dor", *DUE_FIELDS,
+]
+LEAVE_COLUMNS = ["id", "pf_no", "leave_type", "from_date", "to_date", "days"]
+
+
+# ------------------- PARQUET EXPORT -------------------
+
+def parquet_types(model, columns):
+    """
+    DuckDB type per column, taken from the model. Never left to inference:
+    DuckDB types an empty or all-NULL object column as INT32.
+    """
+    types = {}
+    for name in columns:
+        column_type = model.__table__.columns[name].type
+        if isinstance(column_type, Date):
+            types[name] = "DATE"
+        elif isinstance(column_type, Integer):
+            types[name] = "BIGINT"
+        else:
+            types[name] = "VARCHAR"
+    return types
+
+
+def _write_parquet(con, rows, types, path):
+    """
+    Write rows to path through a temp file, so readers never see a
+    half-written file. Every column is cast to its model type.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(rows, columns=list(types))
+    for column, sql_type in types.items():
+        if sql_type == "DATE":
+            frame[column] = pd.to_datetime(frame[column], errors="coerce")
+        elif sql_type == "BIGINT":
+            frame[column] = frame[column].astype("Int64")
+        else:
+            frame[column] = frame[column].astype("string")
+
+    select = ", ".join(f"CAST({c} AS {t}) AS {c}" for c, t in types.items())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    con.register("export_frame", frame)
+    try:
+        con.execute(f"COPY (SELECT {select} FROM export_frame) TO '{tmp_path}' (FORMAT parquet)")
+    finally:
+        con.unregister("export_frame")
+    os.replace(tmp_path, path)
+    return len(frame)
+
+
+STAFF_TYPES = parquet_types(Staff, STAFF_COLUMNS)
+LEAVE_TYPES = parquet_types(Leave, LEAVE_COLUMNS)
+
+
+class AnalyticsStore:
+    """
+    Parquet snapshot plus an in-memory DuckDB database with `staff` and
+    `leave` views over it. The manifest records what each file holds, so
+    a restart only re-exports what it cannot prove is current.
+    """
+
+    def __init__(self, directory=ANALYTICS_DIR):
+        self.directory = directory
+        self.staff_path = os.path.join(directory, "staff.parquet")
+        self.leave_dir = os.path.join(directory, "leave_records")
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._con = None
+        self._manifest = None
+        self._views = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._con is None:
+            import duckdb
+
+            os.makedirs(self.leave_dir, exist_ok=True)
+            self._con = duckdb.connect()
+        return self._con
+
+    def _load_manifest(self):
+        # Re-read on every refresh: another worker may have exported
+        # since, and its files are then reused instead of redone.
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        except (OSError, ValueError):
+            self._manifest = {}
+        if self._manifest.get("format") != SNAPSHOT_FORMAT:
+            self._manifest = {"format": SNAPSHOT_FORMAT}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ---- staff ----
+
+    def _refresh_staff(self, con, db):
+        versions, _ = table_version(("staff",))
+        state = self._manifest.get("staff")
+        if state and state["version"] == versions[0] and os.path.exists(self.staff_path):
+            return False
+
+        columns = [getattr(Staff, c) for c in STAFF_COLUMNS]
+        rows = db.query(*columns).all()
+        count = _write_parquet(con, rows, STAFF_TYPES, self.staff_path)
+
+        self._manifest["staff"] = {
+            "version": versions[0],
+            "rows": count,
+            "exported_at": time.time(),
+        }
+        return True
+
+    # ---- leave_records ----
+
+    def _leave_part(self, number):
+        return os.path.join(self.leave_dir, f"part-{number:05d}.parquet")
+
+    def _refresh_leave(self, con, db):
+        versions, _ = table_version(("leave_records",))
+        state = self._manifest.get("leave_records")
+        if state and state["version"] == versions[0]:
+            return False
+
+        total, max_id = db.query(func.count(Leave.id), func.max(Leave.id)).one()
+        max_id = max_id or 0
+
+        columns = [getattr(Leave, c) for c in LEAVE_COLUMNS]
+        appendable = False
+        if state and state["parts"] < MAX_LEAVE_PARTS:
+            # Unchanged history: the old id range still holds exactly the
+            # rows exported last time.
+            (old_rows,) = db.query(func.count(Leave.id)).filter(Leave.id <= state["max_id"]).one()
+            appendable = old_rows == state["rows"] and max_id >= state["max_id"]
+
+        if appendable:
+            parts = state["parts"]
+            if max_id > state["max_id"]:
+                rows = (
+                    db.query(*columns)
+                    .filter(Leave.id > state["max_id"], Leave.id <= max_id)
+                    .order_by(Leave.id)
+                    .all()
+                )
+                _write_parquet(con, rows, LEAVE_TYPES, self._leave_part(parts))
+                parts += 1
+        else:
+            shutil.rmtree(self.leave_dir, ignore_errors=True)
+            os.makedirs(self.leave_dir, exist_ok=True)
+            rows = db.query(*columns).filter(Leave.id <= max_id).order_by(Leave.id).all()
+            _write_parquet(con, rows, LEAVE_TYPES, self._leave_part(0))
+            parts = 1
+
+        self._manifest["leave_records"] = {
+            "version": versions[0],
+            "rows": total,
+            "max_id": max_id,
+            "parts": parts,
+            "exported_at": time.time(),
+        }
+        return True
+
+    # ---- queries ----
+
+    def refresh(self):
+        """
+        Bring the snapshot up to date. Caller holds the lock.
+        """
+        con = self._connect()
+        self._load_manifest()
+        db = SessionLocal()
+        try:
+            changed = self._refresh_staff(con, db)
+            changed = self._refresh_leave(con, db) or changed
+        finally:
+            db.close()
+
+        if changed:
+            self._save_manifest()
+        if changed or not self._views:
+            con.execute(f"CREATE OR REPLACE VIEW staff AS SELECT * FROM read_parquet('{self.staff_path}')")
+            con.execute(
+                "CREATE OR REPLACE VIEW leave AS SELECT * FROM read_parquet('"
+                + os.path.join(self.leave_dir, "*.parquet") + "')"
+            )
+            self._views = True
+
+    def query(self, sql, params=()):
+        """
+        Run one query against a current snapshot; returns a list of dicts.
+        """
+        with self._lock:
+            self.refresh()
+            cursor = self._con.execute(sql, list(params))
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def info(self):
+        with self._lock:
+            self.refresh()
+            return dict(self._manifest)
+
+
+store = AnalyticsStore()
+
+
+# ------------------- REPORTS -------------------
+
+def leave_by_designation(year_from=None, year_to=None, designation=None):
+    """
+    Leave days per designation per calendar year (year of from_date).
+    """
+    where, params = ["l.from_date IS NOT NULL"], []
+    if year_from:
+        where.append("year(l.from_date) >= ?")
+        params.append(year_from)
+    if year_to:
+        where.append("year(l.from_date) <= ?")
+        params.append(year_to)
+    if designation:
+        where.append("s.designation = ?")
+        params.append(designation)
+
+    return store.query(f"""
+        SELECT coalesce(s.designation, '') AS designation,
+               year(l.from_date) AS year,
+               coalesce(sum(l.days), 0) AS leave_days,
+               count(*) AS records,
+               count(DISTINCT l.pf_no) AS staff
+        FROM leave l LEFT JOIN staff s USING (pf_no)
+        WHERE {' AND '.join(where)}
+        GROUP BY 1, 2
+        ORDER BY year, designation
+    """, params)
+
+
+def due_compliance(start, end, today, bill_unit=None):
+    """
+    Per month of due date and item: how many staff fall due and how many
+    of those dates have already passed without being renewed (overdue).
+    """
+    items = " UNION ALL ".join(
+        f"SELECT '{label}' AS item, {field} AS due, bill_unit FROM staff"
+        for field, label in DUE_FIELDS.items()
+    )
+    where, params = ["due BETWEEN ? AND ?"], [today, start, end]
+    if bill_unit:
+        where.append("bill_unit = ?")
+        params.append(bill_unit)
+
+    return store.query(f"""
+        SELECT strftime(due, '%Y-%m') AS month,
+               item,
+               count(*) AS due,
+               count(*) FILTER (WHERE due < ?) AS overdue
+        FROM ({items})
+        WHERE {' AND '.join(where)}
+        GROUP BY 1, 2
+        ORDER BY month, item
+    """, params)
+
+
+def staff_strength(year_from, year_to, bill_unit=None):
+    """
+    Headcount per bill unit on 31 December of each year: joined on or
+    before that day and not yet retired. Uses each employee's current
+    bill unit; staff without a date of joining are not counted.
+    """
+    where, params = "", [year_from, year_to + 1]
+    if bill_unit:
+        where = "WHERE s.bill_unit = ?"
+        params.append(bill_unit)
+
+    return store.query(f"""
+        SELECT y.year AS year,
+               coalesce(s.bill_unit, '') AS bill_unit,
+               count(*) AS strength
+        FROM range(?, ?) y(year)
+        JOIN staff s
+          ON s.date_of_joining <= make_date(y.year::INTEGER, 12, 31)
+         AND (s.dor IS NULL OR s.dor > make_date(y.year::INTEGER, 12, 31))
+        {where}
+        GROUP BY 1, 2
+        ORDER BY year, bill_unit
+    """, params)
+
+
+# ------------------- ENDPOINTS -------------------
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+TABLES = ("staff", "leave_records")
+
+
+def _json(obj):
+    return Response(
+        json.dumps(obj, default=str, separators=(",", ":")),
+        media_type="application/json",
+    )
+
+
+def _report(request: Request, build, vary=None):
+    """
+    `vary` carries the date-derived inputs of a report (cut-off, window,
+    default year) so the cached body and ETag roll over with the date.
+    """
+    def render():
+        try:
+            rows = build()
+        except ImportError:
+            raise HTTPException(status_code=503, detail="Analytics needs duckdb (pip install duckdb)")
+        return _json({"rows": rows})
+
+    return cached_page(request, TABLES, render, vary)
+
+
+@router.get("/leave-by-designation")
+def leave_by_designation_report(
+    request: Request,
+    year_from: int = None,
+    year_to: int = None,
+    designation: str = None,
+):
+    return _report(request, lambda: leave_by_designation(year_from, year_to, designation))
+
+
+@router.get("/due-compliance")
+def due_compliance_report(
+    request: Request,
+    months_back: int = Query(12, ge=0, le=120),
+    months_ahead: int = Query(3, ge=0, le=120),
+    bill_unit: str = None,
+):
+    today = date.today()
+    first = date(today.year, today.month, 1)
+
+    def shift(months):
+        m = first.month - 1 + months
+        return date(first.year + m // 12, m % 12 + 1, 1)
+
+    start = shift(-months_back)
+    end = shift(months_ahead + 1) - timedelta(days=1)     # last day of that month
+    return _report(
+        request, lambda: due_compliance(start, end, today, bill_unit), (today, start, end)
+    )
+
+
+@router.get("/staff-strength")
+def staff_strength_report(
+    request: Request,
+    year_from: int = None,
+    year_to: int = None,
+    bill_unit: str = None,
+):
+    year_to = year_to or date.today().year
+    year_from = year_from or year_to - 9
+    if year_to - year_from > 100:
+        raise HTTPException(status_code=400, detail="At most 100 years")
+    return _report(
+        request, lambda: staff_strength(year_from, year_to, bill_unit), (year_from, year_to)
+    )
+
+
+@router.get("/snapshot")
+def snapshot_info():
+    """
+    What the Parquet snapshot currently holds (rows, parts, export time).
+    """
+    try:
+        return _json(store.info())
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Analytics needs duckdb (pip install duckdb)")
+
@@ -0,0 +1,387 @@
+# api.py
+
+import base64
+import json
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import auth
+from database import SessionLocal
+from models import Staff, Leave, extra_filters
+from schemas import (
+    MAX_BULK, BulkFetch, BulkError, BulkResult,
+    LeaveIn, LeaveOut, StaffIn, StaffOut, StaffUpdate,
+)
+from utils import calculate_age
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+DEFAULT_PAGE = 100
+MAX_PAGE = 1000
+IN_CHUNK = 500          # stay below SQLite's bound-parameter limit
+STREAM_BATCH = 1000
+
+STAFF_FIELDS = list(StaffOut.model_fields)
+LEAVE_FIELDS = list(LeaveOut.model_fields)
+
+
+# ================= HELPERS =================
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    return json.dumps(obj, default=_json_default, separators=(",", ":"))
+
+
+def _json(obj, status_code=200):
+    return Response(_dumps(obj), status_code=status_code, media_type="application/json")
+
+
+def _projection(fields, allowed, key):
+    """
+    Parse a projection ("a,b,c" or a list) into model columns.
+    The key column is always included so results stay addressable.
+    """
+    if not fields:
+        names = list(allowed)
+    else:
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        names = [f.strip() for f in fields if f.strip()]
+        unknown = set(names) - set(allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+        if key not in names:
+            names.insert(0, key)
+    return names
+
+
+def _staff_columns(names):
+    return [getattr(Staff, n) for n in names]
+
+
+def _encode_cursor(value):
+    return base64.urlsafe_b64encode(_dumps(value).encode()).decode()
+
+
+def _decode_cursor(cursor, kind):
+    """
+    Decode a cursor and check it holds a `kind` (str for pf_no, int for
+    leave id): anything else would reach the keyset filter.
+    """
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _staff_age(dob):
+    age = calculate_age(dob)
+    return str(age) if age else None
+
+
+# ================= SESSION =================
+
+@router.post("/session")
+def api_login(request: Request, username: str = Body(...), password: str = Body(...)):
+    user, retry_after = auth.login(request, username, password)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    return auth.set_session_cookie(JSONResponse({"username": user}), user)
+
+
+# ================= STAFF =================
+
+@router.get("/staff")
+def list_staff(
+    request: Request,
+    fields: Optional[str] = None,
+    designation: Optional[str] = None,
+    bill_unit: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE, ge=1, le=MAX_PAGE),
+):
+    """
+    Keyset pagination on pf_no: pass `next_cursor` back as `cursor`.
+    `extra.<KEY>=<value>` filters on imported extra columns, e.g.
+    `extra.STATION=MAS`.
+    """
+    names = _projection(fields, STAFF_FIELDS, "pf_no")
+
+    db = SessionLocal()
+    try:
+        query = db.query(*_staff_columns(names))
+        if designation:
+            query = query.filter(Staff.designation == designation)
+        if bill_unit:
+            query = query.filter(Staff.bill_unit == bill_unit)
+        query = query.filter(*extra_filters(request.query_params.multi_items()))
+        if cursor:
+            query = query.filter(Staff.pf_no > _decode_cursor(cursor, str))
+
+        rows = query.order_by(Staff.pf_no).limit(limit + 1).all()
+    finally:
+        db.close()
+
+    items = [dict(zip(names, row)) for row in rows[:limit]]
+    next_cursor = _encode_cursor(items[-1]["pf_no"]) if len(rows) > limit else None
+
+    return _json({"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/staff/stream")
+def stream_staff(
+    request: Request,
+    fields: Optional[str] = None,
+    designation: Optional[str] = None,
+    bill_unit: Optional[str] = None,
+):
+    """
+    Every matching staff record as NDJSON, one object per line.
+    Accepts the same `extra.<KEY>=` filters as /staff.
+    """
+    names = _projection(fields, STAFF_FIELDS, "pf_no")
+    extra = extra_filters(request.query_params.multi_items())
+
+    def generate():
+        db = SessionLocal()
+        try:
+            query = db.query(*_staff_columns(names))
+            if designation:
+                query = query.filter(Staff.designation == designation)
+            if bill_unit:
+                query = query.filter(Staff.bill_unit == bill_unit)
+            query = query.filter(*extra)
+
+            batch = []
+            for row in query.order_by(Staff.pf_no).yield_per(STREAM_BATCH):
+                batch.append(_dumps(dict(zip(names, row))))
+                if len(batch) >= STREAM_BATCH:
+                    yield "\n".join(batch) + "\n"
+                    batch = []
+            if batch:
+                yield "\n".join(batch) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/staff/{pf_no}")
+def get_staff(pf_no: str, fields: Optional[str] = None):
+    names = _projection(fields, STAFF_FIELDS, "pf_no")
+
+    db = SessionLocal()
+    try:
+        row = db.query(*_staff_columns(names)).filter(Staff.pf_no == pf_no).first()
+    finally:
+        db.close()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    return _json(dict(zip(names, row)))
+
+
+@router.post("/staff/bulk-fetch")
+def bulk_fetch_staff(payload: BulkFetch):
+    names = _projection(payload.fields, STAFF_FIELDS, "pf_no")
+    wanted = list(dict.fromkeys(payload.pf_nos))
+
+    db = SessionLocal()
+    try:
+        found = {}
+        for chunk in _chunks(wanted, IN_CHUNK):
+            for row in db.query(*_staff_columns(names)).filter(Staff.pf_no.in_(chunk)):
+                item = dict(zip(names, row))
+                found[item["pf_no"]] = item
+    finally:
+        db.close()
+
+    return _json({
+        "items": [found[pf] for pf in wanted if pf in found],
+        "missing": [pf for pf in wanted if pf not in found],
+    })
+
+
+@router.post("/staff/bulk", response_model=BulkResult)
+def bulk_create_staff(items: List[StaffIn] = Body(..., max_length=MAX_BULK)):
+    """
+    Creates every record whose PF No is new; existing PF Nos are reported
+    as errors. Valid records are committed in one transaction.
+    """
+    result = BulkResult()
+
+    db = SessionLocal()
+    try:
+        pf_nos = [item.pf_no for item in items]
+        existing = set()
+        for chunk in _chunks(pf_nos, IN_CHUNK):
+            existing.update(pf for (pf,) in db.query(Staff.pf_no).filter(Staff.pf_no.in_(chunk)))
+
+        for index, item in enumerate(items):
+            if item.pf_no in existing:
+                result.errors.append(BulkError(index=index, pf_no=item.pf_no, error="PF No already exists"))
+                continue
+            existing.add(item.pf_no)
+
+            db.add(Staff(**item.model_dump(), age=_staff_age(item.dob)))
+            result.created += 1
+
+        db.commit()
+    finally:
+        db.close()
+
+    return result
+
+
+@router.patch("/staff/bulk", response_model=BulkResult)
+def bulk_update_staff(items: List[StaffUpdate] = Body(..., max_length=MAX_BULK)):
+    """
+    Partial update: only fields present in each object are written.
+    """
+    result = BulkResult()
+
+    db = SessionLocal()
+    try:
+        staff_by_pf = {}
+        pf_nos = list({item.pf_no for item in items})
+        for chunk in _chunks(pf_nos, IN_CHUNK):
+            for staff in db.query(Staff).filter(Staff.pf_no.in_(chunk)):
+                staff_by_pf[staff.pf_no] = staff
+
+        for index, item in enumerate(items):
+            staff = staff_by_pf.get(item.pf_no)
+            if not staff:
+                result.errors.append(BulkError(index=index, pf_no=item.pf_no, error="Staff not found"))
+                continue
+
+            changes = item.model_dump(exclude_unset=True, exclude={"pf_no"})
+            for field, value in changes.items():
+                setattr(staff, field, value)
+            if "dob" in changes:
+                staff.age = _staff_age(changes["dob"])
+
+            result.updated += 1
+
+        db.commit()
+    finally:
+        db.close()
+
+    return result
+
+
+# ================= LEAVE =================
+
+@router.get("/leave")
+def list_leave(
+    pf_no: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE, ge=1, le=MAX_PAGE),
+):
+    """
+    Leave records overlapping [from_date, to_date], keyset-paginated on id.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Leave)
+        if pf_no:
+            query = query.filter(Leave.pf_no == pf_no)
+        if from_date:
+            query = query.filter(Leave.to_date >= from_date)
+        if to_date:
+            query = query.filter(Leave.from_date <= to_date)
+        if cursor:
+            query = query.filter(Leave.id > _decode_cursor(cursor, int))
+
+        rows = query.order_by(Leave.id).limit(limit + 1).all()
+    finally:
+        db.close()
+
+    items = [LeaveOut.model_validate(r).model_dump() for r in rows[:limit]]
+    next_cursor = _encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+
+    return _json({"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/leave/stream")
+def stream_leave(pf_no: Optional[str] = None, bill_unit: Optional[str] = None):
+    columns = [getattr(Leave, n) for n in LEAVE_FIELDS]
+
+    def generate():
+        db = SessionLocal()
+        try:
+            query = db.query(*columns)
+            if pf_no:
+                query = query.filter(Leave.pf_no == pf_no)
+            if bill_unit:
+                query = query.join(Staff).filter(Staff.bill_unit == bill_unit)
+
+            batch = []
+            for row in query.order_by(Leave.id).yield_per(STREAM_BATCH):
+                batch.append(_dumps(dict(zip(LEAVE_FIELDS, row))))
+                if len(batch) >= STREAM_BATCH:
+                    yield "\n".join(batch) + "\n"
+                    batch = []
+            if batch:
+                yield "\n".join(batch) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/leave/bulk", response_model=BulkResult)
+def bulk_create_leave(items: List[LeaveIn] = Body(..., max_length=MAX_BULK)):
+    result = BulkResult()
+
+    db = SessionLocal()
+    try:
+        known = set()
+        pf_nos = list({item.pf_no for item in items})
+        for chunk in _chunks(pf_nos, IN_CHUNK):
+            known.update(pf for (pf,) in db.query(Staff.pf_no).filter(Staff.pf_no.in_(chunk)))
+
+        for index, item in enumerate(items):
+            if item.to_date < item.from_date:
+                result.errors.append(BulkError(index=index, pf_no=item.pf_no, error="to_date is before from_date"))
+                continue
+            if item.pf_no not in known:
+                result.errors.append(BulkError(index=index, pf_no=item.pf_no, error="Staff not found"))
+                continue
+
+            db.add(Leave(
+                **item.model_dump(),
+                days=(item.to_date - item.from_date).days + 1,
+            ))
+            result.created += 1
+
+        db.commit()
+    finally:
+        db.close()
+
+    return result
@@ -0,0 +1,180 @@
+# audit.py
+#
+# Append-only change log for staff. Every flush that creates, changes or
+# deletes a Staff row appends one staff_audit row per changed column, so
+# the edit form, the API and both importers are covered without extra
+# code at the call sites. The rows are inserted in one executemany per
+# flush: a bulk import costs one batched INSERT, not an ORM object per
+# change.
+#
+# changed_by comes from current_user, which the login middleware sets
+# for each request; scripts and background jobs record "system".
+
+import json
+from contextvars import ContextVar
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, JSON, event, inspect
+from sqlalchemy.orm import Session
+
+from http_cache import mark_written
+from models import Staff, StaffAudit
+
+current_user = ContextVar("audit_user", default="system")
+
+STAFF_COLUMNS = {c.key: c.type for c in Staff.__table__.columns}
+HISTORY_PAGE = 200
+
+
+# ------------------- VALUE ENCODING -------------------
+
+def encode(value):
+    """
+    Text form stored in old_value / new_value. Matches what SQLite keeps
+    in the column, so a float read from Excel and the string it became
+    compare equal.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
+def decode(field, text):
+    if text is None:
+        return None
+    column_type = STAFF_COLUMNS.get(field)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(text)
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(text)
+    if isinstance(column_type, JSON):
+        return json.loads(text)
+    return text
+
+
+def _row(staff, committed=False):
+    """
+    Encoded column values; committed=True gives the values as loaded.
+    """
+    state = inspect(staff)
+    row = {}
+    for field in STAFF_COLUMNS:
+        value = getattr(staff, field)
+        if committed:
+            history = state.attrs[field].history
+            if history.deleted:
+                value = history.deleted[0]
+        row[field] = encode(value)
+    return row
+
+
+# ------------------- CHANGE CAPTURE -------------------
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    now = datetime.now()
+    user = current_user.get()
+    rows = session.info.setdefault("audit_rows", [])
+
+    def add(pf_no, action, field=None, old=None, new=None):
+        rows.append({
+            "pf_no": pf_no,
+            "changed_at": now,
+            "changed_by": user,
+            "action": action,
+            "field": field,
+            "old_value": old,
+            "new_value": new,
+        })
+
+    for obj in session.new:
+        if isinstance(obj, Staff):
+            add(obj.pf_no, "create")
+
+    for obj in session.dirty:
+        if not isinstance(obj, Staff) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        for field in STAFF_COLUMNS:
+            history = state.attrs[field].history
+            if not history.has_changes():
+                continue
+            old = encode(history.deleted[0]) if history.deleted else None
+            new = encode(history.added[0]) if history.added else None
+            if old != new:
+                add(obj.pf_no, "update", field, old, new)
+
+    for obj in session.deleted:
+        if isinstance(obj, Staff):
+            # The whole row, so "as of" can bring a deleted record back.
+            add(obj.pf_no, "delete", old=json.dumps(_row(obj, committed=True)))
+
+
+@event.listens_for(Session, "after_flush")
+def _write_changes(session, flush_context):
+    rows = session.info.pop("audit_rows", None)
+    if rows:
+        session.connection().execute(StaffAudit.__table__.insert(), rows)
+        mark_written(session, StaffAudit.__tablename__)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("audit_rows", None)
+
+
+# ------------------- QUERIES -------------------
+
+def history(db, pf_no, before=None, limit=HISTORY_PAGE):
+    """
+    Newest changes first. `before` is the (changed_at, id) of the last row
+    of the previous page; each page is one range scan of the
+    (pf_no, changed_at) index. Returns (rows, cursor for the next page).
+    """
+    query = db.query(StaffAudit).filter(StaffAudit.pf_no == pf_no)
+    if before:
+        changed_at, last_id = before
+        query = query.filter(
+            (StaffAudit.changed_at < changed_at)
+            | ((StaffAudit.changed_at == changed_at) & (StaffAudit.id < last_id))
+        )
+
+    rows = (
+        query.order_by(StaffAudit.changed_at.desc(), StaffAudit.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    cursor = (rows[limit - 1].changed_at, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], cursor
+
+
+def state_as_of(db, pf_no, when):
+    """
+    The staff record as it was at `when`, or None if it did not exist.
+    Starts from the current row and undoes every change made after
+    `when`, newest first, so the cost depends only on how much changed
+    since then. Edits made before the audit log existed are not known.
+    """
+    staff = db.query(Staff).filter(Staff.pf_no == pf_no).first()
+    state = _row(staff) if staff else None
+
+    changes = (
+        db.query(StaffAudit.action, StaffAudit.field, StaffAudit.old_value)
+        .filter(StaffAudit.pf_no == pf_no, StaffAudit.changed_at > when)
+        .order_by(StaffAudit.changed_at.desc(), StaffAudit.id.desc())
+    )
+    for action, field, old_value in changes:
+        if action == "create":
+            state = None
+        elif action == "delete":
+            state = json.loads(old_value)
+        elif state is not None:
+            state[field] = old_value
+
+    if state is None:
+        return None
+    return {field: decode(field, value) for field, value in state.items()}
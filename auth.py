@@ -0,0 +1,435 @@
+# auth.py
+
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+from passlib.context import CryptContext
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models import User
+
+log = logging.getLogger("hrms.auth")
+
+# ------------------- SETTINGS -------------------
+
+SESSION_COOKIE = "hrms_session"
+SESSION_MAX_AGE = 8 * 60 * 60          # seconds a login stays valid
+
+# Without HRMS_SECRET_KEY every restart invalidates existing sessions.
+SECRET_KEY = (os.environ.get("HRMS_SECRET_KEY") or secrets.token_hex(32)).encode()
+
+SESSION_CACHE_TTL = 60                 # seconds a verified token is trusted
+SESSION_CACHE_SIZE = 10_000
+
+LOGIN_CACHE_TTL = 5 * 60               # seconds a bcrypt check is reused
+
+LOGIN_MAX_FAILURES = 5                 # per (client, username)
+LOGIN_MAX_CLIENT_FAILURES = 20         # per client, across usernames
+LOGIN_WINDOW = 5 * 60                  # seconds
+LOGIN_MAX_KEYS = 10_000                # tracked keys before the oldest go
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# ------------------- PASSWORD HASHING -------------------
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+_login_cache = {}
+_login_lock = threading.Lock()
+
+
+def _login_key(username, password):
+    # Keyed digest so the cache never holds plain passwords.
+    return hmac.new(
+        SECRET_KEY, f"{username}\0{password}".encode(), hashlib.sha256
+    ).digest()
+
+
+def check_password(username: str, password: str, password_hash: str) -> bool:
+    """
+    bcrypt verify with a short-lived cache of successful checks.
+    The cached entry is tied to the stored hash, so a password change
+    invalidates it immediately.
+    """
+    key = _login_key(username, password)
+    now = time.monotonic()
+
+    with _login_lock:
+        cached = _login_cache.get(key)
+    if cached and cached[0] == password_hash and cached[1] > now:
+        return True
+
+    if not pwd_context.verify(password, password_hash):
+        return False
+
+    with _login_lock:
+        if len(_login_cache) >= SESSION_CACHE_SIZE:
+            _login_cache.clear()
+        _login_cache[key] = (password_hash, now + LOGIN_CACHE_TTL)
+    return True
+
+
+def authenticate(username: str, password: str):
+    """
+    Returns the username on success, None otherwise.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+    finally:
+        db.close()
+
+    if not user:
+        # Burn comparable time so unknown usernames are not distinguishable.
+        pwd_context.dummy_verify()
+        return None
+
+    if not check_password(username, password, user.password_hash):
+        return None
+
+    return user.username
+
+
+# ------------------- SIGNED SESSION COOKIE -------------------
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(SECRET_KEY, payload.encode(), hashlib.sha256).digest())
+
+
+# Each user has a session generation (users.session_generation) that is
+# signed into every token. Logout and password changes bump it, which
+# revokes all of that user's outstanding tokens, copies included. Other
+# processes (workers, `python auth.py`) bump it too, so the in-memory
+# copy is re-read after SESSION_CACHE_TTL: a revocation anywhere takes
+# effect everywhere within that time.
+
+_generations = {}                      # username -> (generation, expires)
+_session_cache = {}
+_session_lock = threading.Lock()
+
+
+def _generation(username):
+    """
+    Current session generation, read from the database at most once per
+    SESSION_CACHE_TTL per user. None for unknown users.
+    """
+    now = time.monotonic()
+    cached = _generations.get(username)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    db = SessionLocal()
+    try:
+        generation = (
+            db.query(User.session_generation).filter(User.username == username).scalar()
+        )
+    finally:
+        db.close()
+
+    with _session_lock:
+        if generation is None:
+            _generations.pop(username, None)
+        else:
+            _generations[username] = (generation, now + SESSION_CACHE_TTL)
+    return generation
+
+
+def _parse_token(token):
+    """
+    (username, generation, issued) from a correctly signed token, else None.
+    """
+    try:
+        payload, signature = token.rsplit(".", 1)
+        user_part, generation, issued = payload.split(".")
+        generation, issued = int(generation), int(issued)
+        username = _unb64(user_part).decode()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    return username, generation, issued
+
+
+def create_session(username: str) -> str:
+    """
+    Token format: <b64 username>.<generation>.<issued unix time>.<HMAC-SHA256>
+    """
+    payload = f"{_b64(username.encode())}.{_generation(username)}.{int(time.time())}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_session(token):
+    """
+    Returns the username carried by a valid, unexpired, unrevoked token,
+    else None. The HMAC is the proof; the generation check is usually an
+    in-memory lookup, and recently verified tokens are served from memory.
+    """
+    if not token:
+        return None
+
+    now = time.monotonic()
+    cached = _session_cache.get(token)
+    if cached and cached[1] > now:
+        if _generation(cached[0]) == cached[2]:
+            return cached[0]
+        return None
+
+    parsed = _parse_token(token)
+    if not parsed:
+        return None
+    username, generation, issued = parsed
+
+    remaining = issued + SESSION_MAX_AGE - time.time()
+    if remaining <= 0:
+        return None
+
+    if generation != _generation(username):
+        return None
+
+    with _session_lock:
+        if len(_session_cache) >= SESSION_CACHE_SIZE:
+            _session_cache.clear()
+        _session_cache[token] = (username, now + min(SESSION_CACHE_TTL, remaining), generation)
+
+    return username
+
+
+def revoke_sessions(username):
+    """
+    Invalidate every token issued to the user so far.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            return
+        user.session_generation = (user.session_generation or 0) + 1
+        generation = user.session_generation
+        db.commit()
+    finally:
+        db.close()
+
+    with _session_lock:
+        _generations[username] = (generation, time.monotonic() + SESSION_CACHE_TTL)
+
+
+def end_session(token):
+    """
+    Logout: revokes the user's sessions server-side, so a copied cookie
+    stops working too (the user is signed out on every device).
+    """
+    parsed = _parse_token(token) if token else None
+    if parsed:
+        revoke_sessions(parsed[0])
+    with _session_lock:
+        _session_cache.pop(token, None)
+
+
+# ------------------- LOGIN RATE LIMITING -------------------
+
+class LoginRateLimiter:
+    """
+    Sliding windows of failed attempts per (client, username) and per
+    client, so cycling through usernames is throttled too. Keys with no
+    failures left in the window are evicted, and the number of tracked
+    keys is capped.
+    """
+
+    def __init__(
+        self,
+        max_failures=LOGIN_MAX_FAILURES,
+        max_client_failures=LOGIN_MAX_CLIENT_FAILURES,
+        window=LOGIN_WINDOW,
+        max_keys=LOGIN_MAX_KEYS,
+    ):
+        self.max_failures = max_failures
+        self.max_client_failures = max_client_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._failures = {}
+        self._swept = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _prune(self, attempts, now):
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+
+    def _sweep(self, now):
+        """
+        Drop expired keys (at most once per window), then the oldest
+        keys while over max_keys.
+        """
+        if now - self._swept >= self.window or len(self._failures) > self.max_keys:
+            for key in list(self._failures):
+                attempts = self._failures[key]
+                self._prune(attempts, now)
+                if not attempts:
+                    del self._failures[key]
+            self._swept = now
+        while len(self._failures) > self.max_keys:
+            del self._failures[next(iter(self._failures))]
+
+    def _blocked_for(self, key, limit, now):
+        attempts = self._failures.get(key)
+        if not attempts:
+            return 0
+        self._prune(attempts, now)
+        if len(attempts) < limit:
+            return 0
+        # Free again once enough old failures leave the window.
+        return int(attempts[-limit] + self.window - now) + 1
+
+    def retry_after(self, key) -> int:
+        """
+        Seconds until (client, username) may try again; 0 if not blocked.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return max(
+                self._blocked_for(key, self.max_failures, now),
+                self._blocked_for((key[0],), self.max_client_failures, now),
+            )
+
+    def record_failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            for k in (key, (key[0],)):
+                attempts = self._failures.pop(k, None) or deque()
+                self._prune(attempts, now)
+                attempts.append(now)
+                self._failures[k] = attempts      # re-insert: newest last
+            self._sweep(now)
+
+    def reset(self, key):
+        """
+        Successful login: clears the (client, username) window only; the
+        client's failures against other usernames still count.
+        """
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+login_limiter = LoginRateLimiter()
+
+
+# ------------------- LOGIN -------------------
+
+def login(request, username: str, password: str):
+    """
+    Rate-limited password check shared by the login form and the API.
+    Returns (username, retry_after): the username on success; None and
+    the seconds to wait when throttled; None and 0 for bad credentials.
+    """
+    client = request.client.host if request.client else ""
+    limit_key = (client, username)
+
+    retry_after = login_limiter.retry_after(limit_key)
+    if retry_after:
+        return None, retry_after
+
+    user = authenticate(username, password)
+    if not user:
+        login_limiter.record_failure(limit_key)
+        return None, 0
+
+    login_limiter.reset(limit_key)
+    return user, 0
+
+
+def set_session_cookie(response, username: str):
+    response.set_cookie(
+        SESSION_COOKIE,
+        create_session(username),
+        max_age=SESSION_MAX_AGE,
+        httponly=True,
+        samesite="lax",
+    )
+    return response
+
+
+# ------------------- BOOTSTRAP -------------------
+
+def ensure_admin_user():
+    """
+    Creates the initial `admin` account when the users table is empty.
+    Password comes from HRMS_ADMIN_PASSWORD; without it a random one is
+    generated and logged once, never a fixed default. Every worker runs
+    this at startup: the unique username lets exactly one insert win, and
+    only the winner logs its password.
+    """
+    db = SessionLocal()
+    try:
+        if db.query(User.id).first():
+            return
+
+        password = os.environ.get("HRMS_ADMIN_PASSWORD")
+        generated = not password
+        if generated:
+            password = secrets.token_urlsafe(12)
+
+        db.add(User(username="admin", password_hash=hash_password(password)))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()               # another worker created it first
+            return
+    finally:
+        db.close()
+
+    if generated:
+        log.warning(
+            "HRMS_ADMIN_PASSWORD is not set: created user 'admin' with the "
+            "generated password %r. Change it with `python auth.py admin`.",
+            password,
+        )
+
+
+def set_password(username: str, password: str):
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            user = User(username=username)
+            db.add(user)
+        user.password_hash = hash_password(password)
+        db.commit()
+    finally:
+        db.close()
+
+    # A new password signs out existing sessions.
+    revoke_sessions(username)
+
+
+if __name__ == "__main__":
+    # python auth.py <username>   -> create user or reset password
+    import getpass
+    import sys
+
+    import migrate
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: python auth.py <username>")
+
+    migrate.ensure_schema()
+    set_password(sys.argv[1], getpass.getpass("New password: "))
+    print(f"Password set for {sys.argv[1]}")
@@ -0,0 +1,363 @@
+# backup.py
+#
+# Online snapshots of hrms.db.
+#
+# The copy uses SQLite's online backup API in page-stepped increments
+# inside one read transaction. With the database in WAL mode (see
+# database.py) writers keep committing during the copy, and the held read
+# transaction stops SQLite from restarting the backup after each of their
+# commits. The copy is then gzip-compressed next to a JSON manifest
+# (size, SHA-256, timings).
+#
+#   python backup.py snapshot [--force]
+#   python backup.py list
+#   python backup.py verify <snapshot>
+#   python backup.py restore <snapshot> | --at "YYYY-MM-DD HH:MM"
+#
+# Stop the app before restoring.
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from database import engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DB_PATH = os.path.abspath(engine.url.database)
+BACKUP_DIR = os.environ.get("HRMS_BACKUP_DIR", os.path.join(BASE_DIR, "backups"))
+KEEP = int(os.environ.get("HRMS_BACKUP_KEEP", "14"))
+
+PAGES_PER_STEP = 4096         # 16 MB at the default 4 KB page size
+STEP_PAUSE = 0.002            # seconds between steps, lets writers in
+COMPRESS_LEVEL = 3
+CHUNK = 1024 * 1024
+
+NAME_FORMAT = "hrms-%Y%m%d-%H%M%S-%f"       # microseconds: no same-second clash
+OLD_NAME_FORMAT = "hrms-%Y%m%d-%H%M%S"
+
+
+# ------------------- HELPERS -------------------
+
+def _manifest_path(snapshot):
+    return snapshot[: -len(".db.gz")] + ".json"
+
+
+def _read_manifest(snapshot):
+    """
+    The snapshot's manifest, or None if it is missing or unreadable.
+    """
+    try:
+        with open(_manifest_path(snapshot), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _snapshot_time(snapshot):
+    stamp = os.path.basename(snapshot)[: -len(".db.gz")]
+    try:
+        return datetime.strptime(stamp, NAME_FORMAT)
+    except ValueError:
+        return datetime.strptime(stamp, OLD_NAME_FORMAT)
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    """
+    Snapshot paths, oldest first.
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted(
+        os.path.join(backup_dir, name)
+        for name in os.listdir(backup_dir)
+        if name.startswith("hrms-") and name.endswith(".db.gz")
+    )
+
+
+def _source_signature(db_path):
+    """
+    mtime/size of the database and its WAL: in WAL mode commits land in
+    the -wal file first, so the main file alone can look unchanged.
+    """
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature += [stat.st_mtime, stat.st_size]
+        else:
+            signature += [None, None]
+    return signature
+
+
+def _online_copy(source_path, target_path, pages=PAGES_PER_STEP, pause=STEP_PAUSE):
+    """
+    Page-stepped sqlite3 backup of one consistent point in time.
+    Returns the number of steps taken.
+    """
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if remaining and pause:
+            time.sleep(pause)
+
+    source = sqlite3.connect(source_path, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        source.execute("PRAGMA journal_mode=WAL")
+        # Pin the snapshot: without an open read transaction, every commit
+        # by another connection makes the backup start over.
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        source.backup(target, pages=pages, progress=progress)
+        source.execute("COMMIT")
+    finally:
+        target.close()
+        source.close()
+
+    return steps
+
+
+def _compress(raw_path, gz_path):
+    """
+    gzip raw_path into gz_path, returning the SHA-256 of the raw bytes.
+    """
+    digest = hashlib.sha256()
+    with open(raw_path, "rb") as src, gzip.open(gz_path, "wb", compresslevel=COMPRESS_LEVEL) as dst:
+        while True:
+            block = src.read(CHUNK)
+            if not block:
+                break
+            digest.update(block)
+            dst.write(block)
+    return digest.hexdigest()
+
+
+def _decompress(gz_path, raw_path):
+    digest = hashlib.sha256()
+    with gzip.open(gz_path, "rb") as src, open(raw_path, "wb") as dst:
+        while True:
+            block = src.read(CHUNK)
+            if not block:
+                break
+            digest.update(block)
+            dst.write(block)
+    return digest.hexdigest()
+
+
+# ------------------- SNAPSHOT -------------------
+
+def snapshot(force=False, db_path=DB_PATH, backup_dir=BACKUP_DIR, keep=KEEP):
+    """
+    Take a compressed snapshot. Unless forced, nothing is written when the
+    database file is unchanged since the last snapshot. Returns the
+    manifest dict, or None when skipped.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    signature = _source_signature(db_path)
+
+    existing = list_snapshots(backup_dir)
+    if existing and not force:
+        last = _read_manifest(existing[-1])
+        if last and last.get("source_signature") == signature:
+            return None
+
+    while True:
+        created = datetime.now()
+        gz_path = os.path.join(backup_dir, created.strftime(NAME_FORMAT) + ".db.gz")
+        if not os.path.exists(gz_path):
+            break
+
+    # The .db.gz name only appears once its manifest is written, so a
+    # crash part-way leaves temp files, never a snapshot without manifest.
+    gz_tmp = gz_path + ".tmp"
+    fd, raw_path = tempfile.mkstemp(suffix=".db", dir=backup_dir)
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        steps = _online_copy(db_path, raw_path)
+        copied = time.perf_counter()
+
+        size = os.path.getsize(raw_path)
+        sha256 = _compress(raw_path, gz_tmp)
+        finished = time.perf_counter()
+    except BaseException:
+        if os.path.exists(gz_tmp):
+            os.remove(gz_tmp)
+        raise
+    finally:
+        os.remove(raw_path)
+
+    manifest = {
+        "snapshot": os.path.basename(gz_path),
+        "created": created.isoformat(timespec="seconds"),
+        "source": db_path,
+        "source_signature": signature,
+        "size": size,
+        "compressed_size": os.path.getsize(gz_tmp),
+        "sha256": sha256,
+        "steps": steps,
+        "copy_seconds": round(copied - started, 3),
+        "compress_seconds": round(finished - copied, 3),
+    }
+    with open(_manifest_path(gz_path), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(gz_tmp, gz_path)
+
+    prune(backup_dir, keep)
+    return manifest
+
+
+def prune(backup_dir=BACKUP_DIR, keep=KEEP):
+    """
+    Delete all but the newest `keep` snapshots.
+    """
+    snapshots = list_snapshots(backup_dir)
+    for old in snapshots[: max(len(snapshots) - keep, 0)]:
+        os.remove(old)
+        if os.path.exists(_manifest_path(old)):
+            os.remove(_manifest_path(old))
+
+
+# ------------------- VERIFY / RESTORE -------------------
+
+def _verify_raw(raw_path, manifest, sha256):
+    problems = []
+    if sha256 != manifest["sha256"]:
+        problems.append("checksum mismatch")
+
+    conn = sqlite3.connect(raw_path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != "ok":
+        problems.append(f"integrity_check: {result}")
+
+    return problems
+
+
+def verify(snapshot_path):
+    """
+    Returns a list of problems; empty means the snapshot is good.
+    """
+    manifest = _read_manifest(snapshot_path)
+    if manifest is None:
+        return ["manifest missing or unreadable"]
+
+    fd, raw_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(snapshot_path))
+    os.close(fd)
+    try:
+        return _verify_raw(raw_path, manifest, _decompress(snapshot_path, raw_path))
+    finally:
+        os.remove(raw_path)
+
+
+def snapshot_at(when, backup_dir=BACKUP_DIR):
+    """
+    Newest snapshot taken at or before `when`.
+    """
+    candidates = [s for s in list_snapshots(backup_dir) if _snapshot_time(s) <= when]
+    if not candidates:
+        raise ValueError(f"No snapshot at or before {when}")
+    return candidates[-1]
+
+
+def restore(snapshot_path, db_path=DB_PATH):
+    """
+    Verify the snapshot, then atomically replace db_path with it.
+    The current database is kept as <db>.before-restore.
+    """
+    manifest = _read_manifest(snapshot_path)
+    if manifest is None:
+        raise ValueError("Snapshot has no readable manifest; cannot verify it")
+
+    target_dir = os.path.dirname(db_path)
+    fd, raw_path = tempfile.mkstemp(suffix=".db", dir=target_dir)
+    os.close(fd)
+    try:
+        problems = _verify_raw(raw_path, manifest, _decompress(snapshot_path, raw_path))
+        if problems:
+            raise ValueError(f"Snapshot failed verification: {', '.join(problems)}")
+
+        if os.path.exists(db_path):
+            # Fold the WAL into the main file so the saved copy is complete.
+            conn = sqlite3.connect(db_path)
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                conn.close()
+            shutil.copy2(db_path, db_path + ".before-restore")
+
+        # A leftover WAL would be replayed onto the restored file.
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.replace(raw_path, db_path)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+
+# ------------------- CLI -------------------
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="hrms.db snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("snapshot")
+    cmd.add_argument("--force", action="store_true", help="snapshot even if unchanged")
+
+    commands.add_parser("list")
+
+    cmd = commands.add_parser("verify")
+    cmd.add_argument("snapshot")
+
+    cmd = commands.add_parser("restore")
+    cmd.add_argument("snapshot", nargs="?")
+    cmd.add_argument("--at", help='restore the newest snapshot at or before "YYYY-MM-DD HH:MM"')
+
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        manifest = snapshot(force=args.force)
+        print(json.dumps(manifest, indent=2) if manifest else "Unchanged since last snapshot")
+
+    elif args.command == "list":
+        for path in list_snapshots():
+            m = _read_manifest(path)
+            if m is None:
+                print(f"{os.path.basename(path)}  (manifest missing)")
+                continue
+            print(f"{m['snapshot']}  {m['size'] / 1e6:9.1f} MB -> {m['compressed_size'] / 1e6:8.1f} MB")
+
+    elif args.command == "verify":
+        problems = verify(args.snapshot)
+        print("OK" if not problems else "; ".join(problems))
+        return 1 if problems else 0
+
+    elif args.command == "restore":
+        if args.at:
+            path = snapshot_at(datetime.strptime(args.at, "%Y-%m-%d %H:%M"))
+        elif args.snapshot:
+            path = args.snapshot
+        else:
+            parser.error("restore needs a snapshot or --at")
+        restore(path)
+        print(f"Restored {path} to {DB_PATH}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
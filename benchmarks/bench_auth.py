@@ -0,0 +1,61 @@
+# benchmarks/bench_auth.py
+#
+# Per-request authentication overhead: the cost of verifying the session
+# cookie in the auth middleware. Target: well under 1 ms per request.
+#
+#   python benchmarks/bench_auth.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth
+
+BUDGET_MS = 1.0
+N = 100_000
+
+
+def bench(label, fn, n=N):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    per_call_ms = (time.perf_counter() - start) * 1000 / n
+    status = "OK" if per_call_ms < BUDGET_MS else "OVER BUDGET"
+    print(f"{label:<32} {per_call_ms * 1000:8.2f} us/request  {status}")
+    return per_call_ms
+
+
+def main():
+    # Session generations as after each user's first request: the
+    # per-request path never reaches the database (no expiry here).
+    never = float("inf")
+    auth._generations.update({"admin": (0, never), **{f"user{i}": (0, never) for i in range(N)}})
+
+    token = auth.create_session("admin")
+
+    # Every request carries a token not seen before: full HMAC check.
+    tokens = [auth.create_session(f"user{i}") for i in range(N)]
+    auth._session_cache.clear()
+    cold = bench("verify_session (uncached)", lambda i: auth.verify_session(tokens[i]))
+
+    # Typical browsing: the same cookie on every request.
+    auth.verify_session(token)
+    warm = bench("verify_session (cached)", lambda i: auth.verify_session(token))
+
+    bench("verify_session (bad signature)", lambda i: auth.verify_session(token[:-2] + "xx"))
+
+    # One bcrypt verify versus the cached login check, for reference.
+    password_hash = auth.hash_password("secret")
+    auth._login_cache.clear()
+    start = time.perf_counter()
+    auth.check_password("admin", "secret", password_hash)
+    print(f"{'bcrypt verify (login)':<32} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    bench("check_password (cached)", lambda i: auth.check_password("admin", "secret", password_hash), n=10_000)
+
+    sys.exit(0 if max(cold, warm) < BUDGET_MS else 1)
+
+
+if __name__ == "__main__":
+    main()
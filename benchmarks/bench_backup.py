@@ -0,0 +1,96 @@
+# benchmarks/bench_backup.py
+#
+# Snapshot / verify / restore timings on a synthetic database of the
+# requested size, with a writer inserting leave rows during the backup
+# to show that writes are not blocked for the whole copy.
+#
+#   python benchmarks/bench_backup.py [size_mb]      (default 1024)
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backup
+
+
+def build_db(path, size_mb):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE leave_records (id INTEGER PRIMARY KEY, pf_no TEXT, leave_type TEXT,"
+        " from_date DATE, to_date DATE, days INTEGER, remarks TEXT)"
+    )
+    row = ("12345678901", "LAP", "2026-01-01", "2026-01-05", 5)
+    target = size_mb * 1024 * 1024
+    while os.path.getsize(path) < target:
+        conn.executemany(
+            "INSERT INTO leave_records (pf_no, leave_type, from_date, to_date, days, remarks)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (row + (os.urandom(48).hex() + "x" * random.randint(0, 200),) for _ in range(50_000)),
+        )
+        conn.commit()
+    conn.close()
+
+
+def writer(path, stop, latencies):
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute(
+            "INSERT INTO leave_records (pf_no, leave_type, days) VALUES ('W', 'CL', 1)"
+        )
+        conn.commit()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    conn.close()
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "hrms.db")
+        backup_dir = os.path.join(tmp, "backups")
+
+        start = time.perf_counter()
+        build_db(db_path, size_mb)
+        print(f"built {os.path.getsize(db_path) / 1e6:.0f} MB database in {time.perf_counter() - start:.1f} s")
+
+        stop = threading.Event()
+        latencies = []
+        thread = threading.Thread(target=writer, args=(db_path, stop, latencies))
+        thread.start()
+
+        start = time.perf_counter()
+        manifest = backup.snapshot(force=True, db_path=db_path, backup_dir=backup_dir)
+        snapshot_s = time.perf_counter() - start
+
+        stop.set()
+        thread.join()
+
+        print(f"snapshot           {snapshot_s:8.1f} s  (copy {manifest['copy_seconds']} s in "
+              f"{manifest['steps']} steps, compress {manifest['compress_seconds']} s)")
+        print(f"compressed         {manifest['size'] / 1e6:8.0f} MB -> {manifest['compressed_size'] / 1e6:.0f} MB")
+        if latencies:
+            latencies.sort()
+            print(f"writes during copy {len(latencies):8d}    median {latencies[len(latencies) // 2] * 1000:.1f} ms,"
+                  f" max {latencies[-1] * 1000:.1f} ms")
+
+        snapshot_path = os.path.join(backup_dir, manifest["snapshot"])
+
+        start = time.perf_counter()
+        problems = backup.verify(snapshot_path)
+        print(f"verify             {time.perf_counter() - start:8.1f} s  {'OK' if not problems else problems}")
+
+        start = time.perf_counter()
+        backup.restore(snapshot_path, db_path=db_path)
+        print(f"restore            {time.perf_counter() - start:8.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+#
+# Cold-start cost of one worker: time to import `main` and run the
+# lifespan startup hook, and peak RSS afterwards. Each run is a fresh
+# interpreter. Also fails if pandas / docx / openpyxl got imported at boot.
+#
+# The children run in a temporary directory, so sqlite:///./hrms.db is a
+# scratch database there (migrated and given an admin once, untimed),
+# never the one in the checkout.
+#
+#   python benchmarks/bench_startup.py [runs]
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAX_STARTUP_S = float(os.environ.get("HRMS_BENCH_MAX_STARTUP_S", "1.5"))
+MAX_RSS_MB = float(os.environ.get("HRMS_BENCH_MAX_RSS_MB", "120"))
+
+HEAVY_MODULES = ("pandas", "docx", "openpyxl")
+
+CHILD = r"""
+import asyncio, json, resource, sys, time
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(boot())
+ready = time.perf_counter()
+
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": ready - start,
+    "rss_mb": rss_kb / 1024,
+    "heavy": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def child_env():
+    # No alert scheduler: it would run a real sweep and write mail.
+    path = os.pathsep.join(p for p in (ROOT, os.environ.get("PYTHONPATH")) if p)
+    return {
+        **os.environ,
+        "PYTHONPATH": path,
+        "HRMS_ALERTS": "0",
+        "HRMS_ADMIN_PASSWORD": "bench",
+    }
+
+
+def prepare(workdir):
+    subprocess.run(
+        [sys.executable, "-c", "import auth, migrate\nmigrate.ensure_schema()\nauth.ensure_admin_user()"],
+        cwd=workdir,
+        env=child_env(),
+        capture_output=True,
+        check=True,
+    )
+
+
+def run_once(workdir):
+    out = subprocess.run(
+        [sys.executable, "-c", f"HEAVY = {HEAVY_MODULES!r}\n" + CHILD],
+        cwd=workdir,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory(prefix="hrms_bench_") as workdir:
+        prepare(workdir)
+        results = [run_once(workdir) for _ in range(runs)]
+
+    import_s = statistics.median(r["import_s"] for r in results)
+    startup_s = statistics.median(r["startup_s"] for r in results)
+    rss_mb = statistics.median(r["rss_mb"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"import main        {import_s * 1000:8.1f} ms (median of {runs})")
+    print(f"import + lifespan  {startup_s * 1000:8.1f} ms   budget {MAX_STARTUP_S * 1000:.0f} ms")
+    print(f"peak RSS           {rss_mb:8.1f} MB   budget {MAX_RSS_MB:.0f} MB")
+    print(f"heavy modules      {', '.join(heavy) or 'none'}")
+
+    failed = startup_s > MAX_STARTUP_S or rss_mb > MAX_RSS_MB or heavy
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
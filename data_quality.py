@@ -0,0 +1,233 @@
+# data_quality.py
+#
+# Format and duplicate checks for staff identifiers. Works column-wise
+# on DataFrames: one vectorized regex per column, duplicates by hash
+# grouping. The staff-table scan is cached and refreshed incrementally
+# from the PF Nos written since the last scan.
+
+import threading
+from itertools import chain
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Staff
+
+# field -> (sheet header, pattern for the normalized value)
+RULES = {
+    "pan": ("PAN", r"[A-Z]{5}[0-9]{4}[A-Z]"),
+    "aadhar": ("AADHAR", r"[2-9][0-9]{11}"),
+    "mobile": ("MOBILE", r"[6-9][0-9]{9}"),
+    "email": ("EMAIL", r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}"),
+    "hrms_id": ("HRMS ID", r"[A-Z]{6}"),
+}
+
+FIELDS = list(RULES)
+IN_CHUNK = 500
+
+
+# ------------------- VECTORIZED CHECKS -------------------
+
+def normalize(field, series):
+    """
+    Canonical form used for both validation and duplicate matching.
+    """
+    s = series.astype("string").str.strip()
+    # Numbers read from Excel come back as "9876543210.0"
+    s = s.str.replace(r"\.0$", "", regex=True)
+
+    if field in ("aadhar", "mobile"):
+        s = s.str.replace(r"[\s-]", "", regex=True)
+    if field == "mobile":
+        s = s.str.replace(r"^(?:\+?91|0)(?=\d{10}$)", "", regex=True)
+    if field in ("pan", "hrms_id"):
+        s = s.str.upper()
+    if field == "email":
+        s = s.str.lower()
+
+    return s.mask(s == "")
+
+
+def invalid_flags(frame):
+    """
+    <field>_invalid per row for the FIELDS present in a normalized frame.
+    """
+    flags = pd.DataFrame(index=frame.index)
+    for field in FIELDS:
+        if field in frame:
+            values = frame[field]
+            matches = values.str.fullmatch(RULES[field][1]).fillna(False).astype(bool)
+            flags[f"{field}_invalid"] = values.notna() & ~matches
+    return flags
+
+
+def duplicate_counts(frame):
+    """
+    <field>_dup_count per row: how many rows share the value (0 if empty).
+    """
+    counts = pd.DataFrame(index=frame.index)
+    for field in FIELDS:
+        if field in frame:
+            values = frame[field]
+            counts[f"{field}_dup_count"] = values.map(values.value_counts()).fillna(0).astype(int)
+    return counts
+
+
+def check_frame(frame):
+    return invalid_flags(frame).join(duplicate_counts(frame))
+
+
+def issues_from_flags(frame, flags):
+    """
+    Long-format issues: pf_no, field, value, issue.
+    """
+    parts = []
+
+    for field in FIELDS:
+        if f"{field}_invalid" not in flags:
+            continue
+
+        invalid = flags[f"{field}_invalid"]
+        if invalid.any():
+            parts.append(pd.DataFrame({
+                "pf_no": frame.loc[invalid, "pf_no"],
+                "field": field,
+                "value": frame.loc[invalid, field],
+                "issue": "Invalid format",
+            }))
+
+        dup_count = flags[f"{field}_dup_count"]
+        dup = dup_count > 1
+        if dup.any():
+            parts.append(pd.DataFrame({
+                "pf_no": frame.loc[dup, "pf_no"],
+                "field": field,
+                "value": frame.loc[dup, field],
+                "issue": "Duplicate (" + dup_count[dup].astype(str) + " staff)",
+            }))
+
+    if not parts:
+        return pd.DataFrame(columns=["pf_no", "field", "value", "issue"])
+
+    return (
+        pd.concat(parts, ignore_index=True)
+        .sort_values(["field", "value", "pf_no"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def scan_import_frame(df):
+    """
+    Check an incoming sheet (headers already normalized by
+    excel_import.prepare_frame) before it reaches the master.
+    """
+    frame = pd.DataFrame({"pf_no": df["PF NO"].astype("string").str.strip()})
+    for field, (header, _) in RULES.items():
+        if header in df:
+            frame[field] = normalize(field, df[header])
+
+    return issues_from_flags(frame, check_frame(frame))
+
+
+# ------------------- STAFF TABLE SCAN -------------------
+
+class DataQualityEngine:
+    """
+    Keeps the normalized identifier columns of the whole staff table in
+    memory. After the first full load only PF Nos written since the
+    previous scan are re-read and format-checked; duplicate counts are
+    one grouping pass per column over the cached frame.
+    """
+
+    def __init__(self):
+        self.frame = None
+        self.invalid = None
+        self.issues = None
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def mark_dirty(self, pf_nos):
+        with self._lock:
+            if self.frame is not None:
+                self._dirty.update(pf_nos)
+                self.issues = None
+
+    def _load(self, db, pf_nos=None):
+        columns = [Staff.pf_no] + [getattr(Staff, f) for f in FIELDS]
+        rows = []
+        if pf_nos is None:
+            rows = db.query(*columns).all()
+        else:
+            pf_nos = list(pf_nos)
+            for i in range(0, len(pf_nos), IN_CHUNK):
+                rows.extend(db.query(*columns).filter(Staff.pf_no.in_(pf_nos[i:i + IN_CHUNK])).all())
+
+        frame = pd.DataFrame.from_records(rows, columns=["pf_no"] + FIELDS)
+        for field in FIELDS:
+            frame[field] = normalize(field, frame[field])
+        return frame.set_index("pf_no", drop=False)
+
+    def refresh(self):
+        with self._lock:
+            if self.issues is not None:
+                return self.issues
+
+            db = SessionLocal()
+            try:
+                if self.frame is None:
+                    self.frame = self._load(db)
+                    self.invalid = invalid_flags(self.frame)
+                elif self._dirty:
+                    changed = self._load(db, self._dirty)
+                    # Rows written since the last scan are replaced;
+                    # deleted ones simply do not come back.
+                    dirty = list(self._dirty)
+                    self.frame = pd.concat([self.frame.drop(index=dirty, errors="ignore"), changed])
+                    self.invalid = pd.concat([
+                        self.invalid.drop(index=dirty, errors="ignore"),
+                        invalid_flags(changed),
+                    ])
+            finally:
+                db.close()
+
+            self._dirty.clear()
+            flags = self.invalid.join(duplicate_counts(self.frame))
+            self.issues = issues_from_flags(self.frame, flags)
+            return self.issues
+
+    def page(self, page=1, per_page=100, field=None):
+        issues = self.refresh()
+        if field:
+            issues = issues[issues["field"] == field]
+
+        total = len(issues)
+        start = (page - 1) * per_page
+        rows = issues.iloc[start:start + per_page].to_dict("records")
+        return rows, total
+
+
+scanner = DataQualityEngine()
+
+
+# ------------------- WRITE TRACKING -------------------
+
+@event.listens_for(Session, "after_flush")
+def _track_staff_writes(session, flush_context):
+    pf_nos = session.info.setdefault("dq_pf_nos", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Staff):
+            pf_nos.add(obj.pf_no)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_on_commit(session):
+    pf_nos = session.info.pop("dq_pf_nos", None)
+    if pf_nos:
+        scanner.mark_dirty(pf_nos)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("dq_pf_nos", None)
@@ -1,8 +1,7 @@
 # excel_import.py
 
 import pandas as pd
-from database import SessionLocal
-from models import Staff
+from parallel_import import write_records
 from datetime import datetime, date
 
 
@@ -37,94 +36,169 @@ def calculate_age(dob):
     )
 
 
-# ------------------- IMPORT FUNCTION -------------------
+# ------------------- EXTRA COLUMNS -------------------
 
-def import_staff_excel(file_path: str):
+# Every header read into a Staff column below; anything else in the
+# sheet is kept in Staff.extra_data.
+MAPPED_COLUMNS = {
+    "PF NO", "EMPLOYEE NAME", "DESIGNATION", "DATE OF JOINING", "HRMS ID",
+    "COMMUNITY", "DATE OF BIRTH", "DATE OF RETIREMENT", "QUALIFICATION",
+    "MODE OF APPOINTMENT", "MOBILE", "EMAIL", "CLI NAME", "BILL UNIT",
+    "AGE", "DOT", "PAN", "AADHAR", "PROM.TRG.", "PME DUE", "GR/SR DUE",
+    "TECH.REF.DUE", "GRADATION (A/B/C)", "DATE OF GRADATION",
+    "HIGH SPEED PSYCHO. DONE DATE", "REMARKS",
+}
 
-    df = pd.read_excel(file_path)
 
-    # Normalize column names
+def json_value(value):
+    """
+    Convert a pandas cell to a JSON-storable value.
+    """
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.date().isoformat() if isinstance(value, datetime) else value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def extra_data_from_row(row, extra_columns):
+    extra = {}
+    for col in extra_columns:
+        value = row.get(col)
+        if pd.isna(value) or str(value).strip() == "":
+            continue
+        extra[col] = json_value(value)
+    return extra or None
+
+
+# ------------------- SHEET LAYOUT -------------------
+
+REQUIRED_COLUMNS = {
+    "PF NO",
+    "EMPLOYEE NAME",
+    "DESIGNATION",
+    "DATE OF JOINING",
+    "DATE OF BIRTH",
+    "DATE OF RETIREMENT",
+    "CLI NAME",
+    "MOBILE",
+    "EMAIL",
+}
+
+
+def prepare_frame(df):
+    """
+    Normalize headers in place, check required columns and return the
+    list of columns destined for extra_data.
+    """
     df.columns = [str(c).strip().upper() for c in df.columns]
 
-    REQUIRED_COLUMNS = {
-        "PF NO",
-        "EMPLOYEE NAME",
-        "DESIGNATION",
-        "DATE OF JOINING",
-        "DATE OF BIRTH",
-        "DATE OF RETIREMENT",
-        "CLI NAME",
-        "MOBILE",
-        "EMAIL",
-    }
-
     missing = REQUIRED_COLUMNS - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    db = SessionLocal()
+    return [
+        c for c in df.columns
+        if c not in MAPPED_COLUMNS and not c.startswith("UNNAMED:")
+    ]
+
+
+def plain_value(value):
+    """
+    Cell value as a plain Python object (no NaN/NaT, no numpy scalars),
+    safe to pickle across processes and to compare with stored values.
+    """
+    if value is None or isinstance(value, dict):
+        return value
+    if pd.isna(value):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def staff_record(row, extra_columns):
+    """
+    Map one sheet row to Staff column values.
+    Returns None when the row has no PF NO.
+    """
+    pf_no = row.get("PF NO")
+
+    if pd.isna(pf_no) or str(pf_no).strip() == "":
+        return None
+
+    dob = clean_date(row.get("DATE OF BIRTH"))
+    calculated_age = calculate_age(dob)
+
+    return dict(
+        pf_no=str(pf_no).strip(),
+        name=row.get("EMPLOYEE NAME"),
+        designation=row.get("DESIGNATION"),
+
+        date_of_joining=clean_date(row.get("DATE OF JOINING")),
+        hrms_id=row.get("HRMS ID"),
+        community=row.get("COMMUNITY"),
+        dob=dob,
+        dor=clean_date(row.get("DATE OF RETIREMENT")),
+        qualification=row.get("QUALIFICATION"),
+        mode_of_appointment=row.get("MODE OF APPOINTMENT"),
+
+        mobile=row.get("MOBILE"),
+        email=row.get("EMAIL"),
+        cli_name=row.get("CLI NAME"),
+        bill_unit=row.get("BILL UNIT"),
+
+        age=str(calculated_age) if calculated_age else None,
+        dot=row.get("DOT"),
+        pan=row.get("PAN"),
+        aadhar=row.get("AADHAR"),
+
+        prom_trg=row.get("PROM.TRG."),
+        pme_due=clean_date(row.get("PME DUE")),
+        gr_sr_due=clean_date(row.get("GR/SR DUE")),
+        tech_ref_due=clean_date(row.get("TECH.REF.DUE")),
+
+        gradation=row.get("GRADATION (A/B/C)"),
+        date_of_gradation=clean_date(row.get("DATE OF GRADATION")),
+        high_speed_psycho_date=clean_date(
+            row.get("HIGH SPEED PSYCHO. DONE DATE")
+        ),
+
+        remarks=row.get("REMARKS"),
+        extra_data=extra_data_from_row(row, extra_columns),
+    )
+
+
+# ------------------- IMPORT FUNCTION -------------------
+
+def import_staff_excel(file_path: str):
+    df = pd.read_excel(file_path)
+
+    extra_columns = prepare_frame(df)
 
+    records = {}
     inserted = 0
     skipped = 0
     skipped_details = []
 
     for idx, row in df.iterrows():
         try:
-            pf_no = row.get("PF NO")
+            record = staff_record(row, extra_columns)
 
-            if pd.isna(pf_no) or str(pf_no).strip() == "":
+            if record is None:
                 skipped += 1
                 skipped_details.append((idx + 2, "Missing PF NO"))
                 continue
 
-            dob = clean_date(row.get("DATE OF BIRTH"))
-            calculated_age = calculate_age(dob)
-
-            staff = Staff(
-                pf_no=str(pf_no).strip(),
-                name=row.get("EMPLOYEE NAME"),
-                designation=row.get("DESIGNATION"),
-
-                date_of_joining=clean_date(row.get("DATE OF JOINING")),
-                hrms_id=row.get("HRMS ID"),
-                community=row.get("COMMUNITY"),
-                dob=dob,
-                dor=clean_date(row.get("DATE OF RETIREMENT")),
-                qualification=row.get("QUALIFICATION"),
-                mode_of_appointment=row.get("MODE OF APPOINTMENT"),
-
-                mobile=row.get("MOBILE"),
-                email=row.get("EMAIL"),
-                cli_name=row.get("CLI NAME"),
-                bill_unit=row.get("BILL UNIT"),
-
-                age=str(calculated_age) if calculated_age else None,
-                dot=row.get("DOT"),
-                pan=row.get("PAN"),
-                aadhar=row.get("AADHAR"),
-
-                prom_trg=row.get("PROM.TRG."),
-                pme_due=clean_date(row.get("PME DUE")),
-                gr_sr_due=clean_date(row.get("GR/SR DUE")),
-                tech_ref_due=clean_date(row.get("TECH.REF.DUE")),
-
-                gradation=row.get("GRADATION (A/B/C)"),
-                date_of_gradation=clean_date(row.get("DATE OF GRADATION")),
-                high_speed_psycho_date=clean_date(
-                    row.get("HIGH SPEED PSYCHO. DONE DATE")
-                ),
-
-                remarks=row.get("REMARKS"),
-            )
-
-            db.merge(staff)
+            # Later rows win for a repeated PF NO, as merge() did.
+            records[record["pf_no"]] = {k: plain_value(v) for k, v in record.items()}
             inserted += 1
 
         except Exception as e:
             skipped += 1
             skipped_details.append((idx + 2, str(e)))
 
-    db.commit()
-    db.close()
+    # Batched upsert that writes (and audits) only changed columns.
+    write_records(records)
 
     return inserted, skipped, skipped_details
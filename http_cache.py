@@ -0,0 +1,246 @@
+# http_cache.py
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from itertools import chain
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from database import engine
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _release_id():
+    """
+    Changes whenever the code or a template changes, and is the same in
+    every worker, so a deploy invalidates ETags but workers share them.
+    """
+    digest = hashlib.sha1()
+    for folder in (BASE_DIR, os.path.join(BASE_DIR, "templates")):
+        for name in sorted(os.listdir(folder)):
+            if name.endswith((".py", ".html")):
+                digest.update(f"{name}:{os.stat(os.path.join(folder, name)).st_mtime_ns};".encode())
+    return digest.hexdigest()[:8]
+
+
+RELEASE_ID = _release_id()
+
+
+# ------------------- TABLE VERSIONS -------------------
+#
+# Every transaction that writes a table replaces its token in
+# table_versions, in that same transaction, so every worker (and any
+# script writing through the ORM) sees the change. Tokens are random
+# rather than counters: after a backup restore the old tokens come back
+# together with the data they describe.
+
+_BUMP = text(
+    "INSERT INTO table_versions (name, token, modified) VALUES (:name, :token, :modified) "
+    "ON CONFLICT (name) DO UPDATE SET token = excluded.token, modified = excluded.modified"
+)
+
+
+def bump(connection, *tables):
+    now = time.time()
+    connection.execute(_BUMP, [
+        {"name": table, "token": uuid.uuid4().hex[:16], "modified": now}
+        for table in tables
+    ])
+
+
+def table_version(tables):
+    """
+    Returns (token tuple, last-modified unix time) for the given tables.
+    A table never written since migration 0006 has token "" and time 0.
+    """
+    params = {f"t{i}": t for i, t in enumerate(tables)}
+    placeholders = ", ".join(":" + p for p in params)
+    with engine.connect() as conn:
+        found = {
+            name: (token, modified)
+            for name, token, modified in conn.execute(
+                text(f"SELECT name, token, modified FROM table_versions WHERE name IN ({placeholders})"),
+                params,
+            )
+        }
+    versions = tuple(found.get(t, ("", 0))[0] for t in tables)
+    modified = max(found.get(t, ("", 0))[1] for t in tables)
+    return versions, modified
+
+
+def mark_written(session, *tables):
+    """
+    Record writes the ORM does not see (bulk inserts, raw SQL);
+    the tokens are replaced before the session commits.
+    """
+    session.info.setdefault("written_tables", set()).update(tables)
+
+
+def _bump_written(session):
+    written = session.info.pop("written_tables", None)
+    if written:
+        bump(session.connection(), *sorted(written))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    written = session.info.setdefault("written_tables", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _bump_on_flush(session, flush_context):
+    # After every after_flush hook, so tables they mark_written() count.
+    _bump_written(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session):
+    _bump_written(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("written_tables", None)
+
+
+# ------------------- RENDERED RESPONSE CACHE -------------------
+
+class ResponseCache:
+    """
+    LRU cache of rendered bodies, bounded by entry count and total bytes.
+    Keys embed the table tokens, so stale entries are never served;
+    they simply age out.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, max_entry_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, status_code, headers):
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (body, status_code, headers)
+            self._size += len(body)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache()
+
+
+# ------------------- CONDITIONAL GET -------------------
+
+def _etag_matches(header, etag):
+    # Weak comparison, as If-None-Match requires.
+    if header.strip() == "*":
+        return True
+    candidates = [t.strip() for t in header.split(",")]
+    return any(c.removeprefix("W/") == etag.removeprefix("W/") for c in candidates)
+
+
+def _not_modified(request: Request, etag, modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(modified) <= since
+
+    return False
+
+
+def cached_page(request: Request, tables, render, vary=None):
+    """
+    Serve a GET page through ETag / Last-Modified validation and the
+    rendered-response cache. `render` is only called on a cache miss and
+    must return a fully rendered Response (not a streaming one).
+
+    `vary` is anything else the body depends on besides the tables, such
+    as today's date. It goes into the key and ETag, and Last-Modified is
+    then left out because table writes alone no longer date the body.
+    """
+    versions, modified = table_version(tables)
+
+    key = "|".join((
+        RELEASE_ID,
+        request.url.path,
+        str(sorted(request.query_params.multi_items())),
+        ",".join(map(str, versions)),
+        "" if vary is None else str(vary),
+    ))
+    # Weak: compression middleware sends different bytes for one body.
+    etag = 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+    validators = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+    }
+    if vary is None:
+        validators["Last-Modified"] = formatdate(modified, usegmt=True)
+    else:
+        modified = None
+
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=validators)
+
+    entry = response_cache.get(key)
+    if entry is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+        headers = {
+            k: v for k, v in response.headers.items()
+            if k not in ("content-length", "set-cookie")
+        }
+        entry = (response.body, response.status_code, headers)
+        response_cache.put(key, *entry)
+
+    body, status_code, headers = entry
+    return Response(content=body, status_code=status_code, headers={**headers, **validators})
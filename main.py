@@ -1,31 +1,62 @@
 import os
 import shutil
 import sqlite3
+import tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime, date, timedelta
+from typing import List
 
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 
 from sqlalchemy.orm import joinedload
 
-from database import SessionLocal, engine
-from models import Base, Staff, Leave
-from excel_import import import_staff_excel
+from database import SessionLocal
+from models import Staff, Leave, EXTRA_DATA_INDEXED_KEYS, extra_filters
+import auth
+import analytics
+import api
+import alerts
+import audit
+import migrate
+from http_cache import cached_page
 
-import pandas as pd
 from io import BytesIO
 
-from docx import Document
-from docx.shared import Inches
-from docx.enum.section import WD_ORIENT
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-# ================= BASE SETUP =================
+# pandas, openpyxl and python-docx are imported inside the upload,
+# export and report handlers: most requests never need them and they
+# dominate worker boot time and memory.
 
-app = FastAPI(title="HRMS")
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+# ================= BASE SETUP =================
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrate.ensure_schema()
+    auth.ensure_admin_user()
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    run_alerts = os.environ.get("HRMS_ALERTS", "1") != "0"
+    if run_alerts:
+        alerts.scheduler.start()
+
+    yield
+
+    if run_alerts:
+        alerts.scheduler.stop()
+
+
+app = FastAPI(title="HRMS", lifespan=lifespan)
 
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
@@ -35,7 +66,36 @@ app.mount(
     name="static"
 )
 
-Base.metadata.create_all(bind=engine)
+app.include_router(api.router)
+app.include_router(analytics.router)
+
+# Brotli when available (falls back to gzip for clients without br),
+# plain gzip otherwise.
+if BrotliMiddleware:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# ================= AUTH MIDDLEWARE =================
+
+PUBLIC_PATHS = {"/", "/login", "/api/v1/session"}
+
+
+@app.middleware("http")
+async def require_login(request: Request, call_next):
+    path = request.url.path
+    if path in PUBLIC_PATHS or path.startswith("/static/"):
+        return await call_next(request)
+
+    user = auth.verify_session(request.cookies.get(auth.SESSION_COOKIE))
+    if not user:
+        if path.startswith("/api/"):
+            return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+        return RedirectResponse("/", status_code=302)
+
+    request.state.user = user
+    audit.current_user.set(user)
+    return await call_next(request)
 
 # ================= HELPER FUNCTIONS =================
 
@@ -63,11 +123,32 @@ def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 
-@app.post("/login")
-def login(username: str = Form(...), password: str = Form(...)):
-    if username == "admin" and password == "admin":
-        return RedirectResponse("/dashboard", status_code=302)
-    return RedirectResponse("/", status_code=302)
+@app.post("/login", response_class=HTMLResponse)
+def login(request: Request, username: str = Form(...), password: str = Form(...)):
+    user, retry_after = auth.login(request, username, password)
+    if retry_after:
+        return templates.TemplateResponse(
+            "login.html",
+            {"request": request, "error": "Too many failed attempts. Try again later."},
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+    if not user:
+        return templates.TemplateResponse(
+            "login.html",
+            {"request": request, "error": "Invalid username or password"},
+            status_code=401,
+        )
+
+    return auth.set_session_cookie(RedirectResponse("/dashboard", status_code=302), user)
+
+
+@app.get("/logout")
+def logout(request: Request):
+    auth.end_session(request.cookies.get(auth.SESSION_COOKIE))
+    response = RedirectResponse("/", status_code=302)
+    response.delete_cookie(auth.SESSION_COOKIE)
+    return response
 
 # ================= DASHBOARD =================
 
@@ -79,15 +160,35 @@ def dashboard(request: Request):
 
 @app.get("/staff", response_class=HTMLResponse)
 def staff_master(request: Request):
+    return cached_page(request, ("staff",), lambda: render_staff_master(request))
+
+
+def render_staff_master(request: Request):
+    # ?extra.STATION=MAS etc. filter on imported extra columns
+    params = request.query_params.multi_items()
+
     db = SessionLocal()
     try:
-        staff = db.query(Staff).order_by(Staff.pf_no).all()
+        staff = (
+            db.query(Staff)
+            .filter(*extra_filters(params))
+            .order_by(Staff.pf_no)
+            .all()
+        )
     finally:
         db.close()
 
     return templates.TemplateResponse(
         "staff_master.html",
-        {"request": request, "staff": staff}
+        {
+            "request": request,
+            "staff": staff,
+            "extra_keys": EXTRA_DATA_INDEXED_KEYS,
+            "extra_values": {
+                name[len("extra."):].upper(): value
+                for name, value in params if name.startswith("extra.")
+            },
+        }
     )
 
 # ================= ADD STAFF =================
@@ -183,51 +284,50 @@ def update_staff(
         if not staff:
             raise HTTPException(status_code=404, detail="Staff not found")
 
-        # Parse date fields
         parsed_dob = parse_date(dob)
-        parsed_doj = parse_date(date_of_joining)
-        parsed_dor = parse_date(dor)
-        parsed_pme = parse_date(pme_due)
-        parsed_gr = parse_date(gr_sr_due)
-        parsed_tech = parse_date(tech_ref_due)
-        parsed_gradation = parse_date(date_of_gradation)
-
-        # Update fields
-        staff.name = name
-        staff.designation = designation
-        staff.hrms_id = hrms_id
-        staff.community = community
-
-        staff.date_of_joining = parsed_doj
-        staff.dob = parsed_dob
-        staff.dor = parsed_dor
-
-        staff.mobile = mobile
-        staff.email = email
-        staff.cli_name = cli_name
-
-        staff.qualification = qualification
-        staff.mode_of_appointment = mode_of_appointment
-        staff.bill_unit = bill_unit
-
-        staff.dot = dot
-        staff.pan = pan
-        staff.aadhar = aadhar
-
-        staff.prom_trg = prom_trg
-        staff.pme_due = parsed_pme
-        staff.gr_sr_due = parsed_gr
-        staff.tech_ref_due = parsed_tech
-
-        staff.gradation = gradation
-        staff.date_of_gradation = parsed_gradation
-        staff.high_speed_psycho_date = high_speed_psycho_date
-
-        staff.remarks = remarks
+
+        values = {
+            "name": name,
+            "designation": designation,
+            "hrms_id": hrms_id,
+            "community": community,
+
+            "date_of_joining": parse_date(date_of_joining),
+            "dob": parsed_dob,
+            "dor": parse_date(dor),
+
+            "mobile": mobile,
+            "email": email,
+            "cli_name": cli_name,
+
+            "qualification": qualification,
+            "mode_of_appointment": mode_of_appointment,
+            "bill_unit": bill_unit,
+
+            "dot": dot,
+            "pan": pan,
+            "aadhar": aadhar,
+
+            "prom_trg": prom_trg,
+            "pme_due": parse_date(pme_due),
+            "gr_sr_due": parse_date(gr_sr_due),
+            "tech_ref_due": parse_date(tech_ref_due),
+
+            "gradation": gradation,
+            "date_of_gradation": parse_date(date_of_gradation),
+            "high_speed_psycho_date": high_speed_psycho_date,
+
+            "remarks": remarks,
+        }
 
         # Auto recalc age
         if parsed_dob:
-            staff.age = str(calculate_age(parsed_dob))
+            values["age"] = str(calculate_age(parsed_dob))
+
+        # Only columns that actually changed are written (and audited).
+        for field, value in values.items():
+            if getattr(staff, field) != value:
+                setattr(staff, field, value)
 
         db.commit()
 
@@ -236,10 +336,61 @@ def update_staff(
 
     return RedirectResponse("/staff", status_code=302)
 
+# ================= STAFF HISTORY =================
+
+@app.get("/staff/{pf_no}/history", response_class=HTMLResponse)
+def staff_history(request: Request, pf_no: str, as_of: str = None, before: str = None):
+    return cached_page(
+        request, ("staff",), lambda: render_staff_history(request, pf_no, as_of, before)
+    )
+
+
+def render_staff_history(request: Request, pf_no: str, as_of: str, before: str):
+    as_of_date = parse_date(as_of)
+
+    cursor = None
+    if before:
+        try:
+            changed_at, last_id = before.rsplit("_", 1)
+            cursor = (datetime.fromisoformat(changed_at), int(last_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    db = SessionLocal()
+    try:
+        changes, next_cursor = audit.history(db, pf_no, cursor)
+        if not changes and not cursor and not db.query(Staff.pf_no).filter(Staff.pf_no == pf_no).first():
+            raise HTTPException(status_code=404, detail="Staff not found")
+
+        state = None
+        if as_of_date:
+            # End of the chosen day
+            state = audit.state_as_of(db, pf_no, datetime.combine(as_of_date, datetime.max.time()))
+    finally:
+        db.close()
+
+    return templates.TemplateResponse(
+        "staff_history.html",
+        {
+            "request": request,
+            "pf_no": pf_no,
+            "changes": changes,
+            "next_cursor": f"{next_cursor[0].isoformat()}_{next_cursor[1]}" if next_cursor else None,
+            "as_of": as_of_date,
+            "state": state,
+        }
+    )
+
 # ================= LEAVE MANAGEMENT ==================
 
 @app.get("/staff/{pf_no}/leave", response_class=HTMLResponse)
 def view_leave(request: Request, pf_no: str):
+    return cached_page(
+        request, ("staff", "leave_records"), lambda: render_leave(request, pf_no)
+    )
+
+
+def render_leave(request: Request, pf_no: str):
     db = SessionLocal()
     try:
         staff = (
@@ -300,6 +451,10 @@ def add_leave(
 
 @app.get("/reports", response_class=HTMLResponse)
 def reports_page(request: Request):
+    return cached_page(request, ("staff",), lambda: render_reports_page(request))
+
+
+def render_reports_page(request: Request):
     db = SessionLocal()
     try:
         # Get distinct designations and bill units
@@ -396,10 +551,47 @@ def generate_report(
             "report_type": report_type
         }
     )
+# ================= DATA QUALITY =================
+
+DQ_PAGE_SIZE = 100
+
+
+@app.get("/data-quality", response_class=HTMLResponse)
+def data_quality_report(request: Request, page: int = 1, field: str = None):
+    return cached_page(
+        request, ("staff",), lambda: render_data_quality(request, page, field)
+    )
+
+
+def render_data_quality(request: Request, page: int, field: str):
+    from data_quality import scanner, FIELDS
+
+    page = max(page, 1)
+    issues, total = scanner.page(page, DQ_PAGE_SIZE, field or None)
+
+    return templates.TemplateResponse(
+        "data_quality.html",
+        {
+            "request": request,
+            "issues": issues,
+            "total": total,
+            "page": page,
+            "pages": max(1, -(-total // DQ_PAGE_SIZE)),
+            "field": field or "",
+            "fields": FIELDS,
+        }
+    )
+
 # ================= EXPORT STAFF =================
 
 @app.get("/staff/export")
-def export_staff():
+def export_staff(request: Request):
+    return cached_page(request, ("staff",), render_staff_export)
+
+
+def render_staff_export():
+    import pandas as pd
+
     db = SessionLocal()
     try:
         staff = db.query(Staff).all()
@@ -450,10 +642,9 @@ def export_staff():
 
     output = BytesIO()
     df.to_excel(output, index=False)
-    output.seek(0)
 
-    return StreamingResponse(
-        output,
+    return Response(
+        output.getvalue(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
             "Content-Disposition": "attachment; filename=staff_export.xlsx"
@@ -461,9 +652,6 @@ def export_staff():
     )
 # ================= UPLOAD =================
 
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 @app.get("/upload", response_class=HTMLResponse)
 def upload_page(request: Request):
     return templates.TemplateResponse("upload.html", {"request": request})
@@ -471,6 +659,8 @@ def upload_page(request: Request):
 
 @app.post("/upload", response_class=HTMLResponse)
 async def upload_file(request: Request, file: UploadFile = File(...)):
+    from excel_import import import_staff_excel
+
     file_path = os.path.join(UPLOAD_DIR, file.filename)
 
     with open(file_path, "wb") as buffer:
@@ -493,6 +683,40 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
             "skipped_details": skipped_details
         }
     )
+
+
+@app.post("/upload/bulk", response_class=HTMLResponse)
+def upload_bulk(request: Request, files: List[UploadFile] = File(...)):
+    from parallel_import import import_workbooks
+
+    batch_dir = tempfile.mkdtemp(prefix="bulk_", dir=UPLOAD_DIR)
+    extract_dir = os.path.join(batch_dir, "extracted")
+    os.makedirs(extract_dir)
+
+    try:
+        paths = []
+        for index, upload in enumerate(files):
+            # Index prefix: same-named files from different folders must
+            # not overwrite each other. It also keeps the selection order.
+            name = f"{index:03d}_{os.path.basename(upload.filename)}"
+            file_path = os.path.join(batch_dir, name)
+            with open(file_path, "wb") as buffer:
+                shutil.copyfileobj(upload.file, buffer)
+            paths.append(file_path)
+
+        summary = import_workbooks(paths, extract_dir)
+    except Exception as e:
+        return HTMLResponse(
+            f"<h3 style='color:red'>Upload Failed</h3><pre>{e}</pre>",
+            status_code=500
+        )
+    finally:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+
+    return templates.TemplateResponse(
+        "bulk_import_result.html",
+        {"request": request, **summary}
+    )
   # ================= ABSENTEE REPORT =================
 
 @app.post("/reports/leave-absentee")
@@ -505,6 +729,11 @@ def generate_absentee_report(
     to_officer: str = Form(...),
     dept: str = Form(...),
 ):
+    from docx import Document
+    from docx.shared import Inches
+    from docx.enum.section import WD_ORIENT
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
     db = SessionLocal()
 
     try:
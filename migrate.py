@@ -0,0 +1,67 @@
+# migrate.py
+#
+# Schema management through Alembic (migrations/). Revision ids are
+# zero-padded sequence numbers, so create new ones with e.g.
+#
+#   alembic revision --rev-id 0003 -m "describe change"
+#
+# and apply them with `alembic upgrade head` or by starting the app.
+
+import os
+
+from sqlalchemy import text
+
+from database import engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VERSIONS_DIR = os.path.join(BASE_DIR, "migrations", "versions")
+
+
+def head_revision():
+    """
+    Latest revision id, read from the file names. Avoids importing
+    Alembic just to learn the database is already current.
+    """
+    revisions = [
+        name.split("_", 1)[0]
+        for name in os.listdir(VERSIONS_DIR)
+        if name.endswith(".py") and name[0].isdigit()
+    ]
+    return max(revisions)
+
+
+def current_revision():
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except Exception:
+            return None
+
+
+def upgrade():
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    config.attributes["configure_logging"] = False
+    command.upgrade(config, "head")
+
+
+def ensure_schema():
+    """
+    Startup check. Fast path: HRMS_SKIP_MIGRATIONS=1 skips it entirely,
+    and a database already at head costs one SELECT.
+    """
+    if os.environ.get("HRMS_SKIP_MIGRATIONS") == "1":
+        return
+
+    if current_revision() == head_revision():
+        return
+
+    upgrade()
+
+
+if __name__ == "__main__":
+    ensure_schema()
+    print(f"Database at revision {current_revision()}")
@@ -0,0 +1,83 @@
+"""baseline: staff, leave_records, users
+
+Databases created by the old Base.metadata.create_all() already have
+these tables; they are left untouched and simply stamped.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "staff" not in existing:
+        op.create_table(
+            "staff",
+            sa.Column("pf_no", sa.String(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("designation", sa.String()),
+            sa.Column("date_of_joining", sa.Date()),
+            sa.Column("hrms_id", sa.String()),
+            sa.Column("community", sa.String()),
+            sa.Column("dob", sa.Date()),
+            sa.Column("dor", sa.Date()),
+            sa.Column("qualification", sa.String()),
+            sa.Column("mode_of_appointment", sa.String()),
+            sa.Column("mobile", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("cli_name", sa.String()),
+            sa.Column("bill_unit", sa.String()),
+            sa.Column("age", sa.String()),
+            sa.Column("dot", sa.String()),
+            sa.Column("pan", sa.String()),
+            sa.Column("aadhar", sa.String()),
+            sa.Column("prom_trg", sa.String()),
+            sa.Column("pme_due", sa.Date()),
+            sa.Column("gr_sr_due", sa.Date()),
+            sa.Column("tech_ref_due", sa.Date()),
+            sa.Column("gradation", sa.String()),
+            sa.Column("date_of_gradation", sa.Date()),
+            sa.Column("high_speed_psycho_date", sa.String()),
+            sa.Column("remarks", sa.String()),
+            sa.Column("extra_data", sa.JSON()),
+        )
+        op.create_index("ix_staff_pf_no", "staff", ["pf_no"])
+
+    if "leave_records" not in existing:
+        op.create_table(
+            "leave_records",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("pf_no", sa.String(), sa.ForeignKey("staff.pf_no")),
+            sa.Column("leave_type", sa.String()),
+            sa.Column("from_date", sa.Date()),
+            sa.Column("to_date", sa.Date()),
+            sa.Column("days", sa.Integer()),
+            sa.Column("remarks", sa.String()),
+        )
+        op.create_index("ix_leave_records_id", "leave_records", ["id"])
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+
+def downgrade():
+    op.drop_table("users")
+    op.drop_table("leave_records")
+    op.drop_table("staff")
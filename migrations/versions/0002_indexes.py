@@ -0,0 +1,64 @@
+"""filter indexes and extra_data expression indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+STAFF_INDEXES = [
+    "designation",
+    "bill_unit",
+    "cli_name",
+    "pme_due",
+    "gr_sr_due",
+    "tech_ref_due",
+    "date_of_gradation",
+]
+
+LEAVE_INDEXES = [
+    "pf_no",
+    "from_date",
+]
+
+# Frozen copy of models.EXTRA_DATA_INDEXED_KEYS at this revision.
+EXTRA_DATA_KEYS = {
+    "category": "CATEGORY",
+    "station": "STATION",
+    "section": "SECTION",
+}
+
+
+def upgrade():
+    for column in STAFF_INDEXES:
+        op.create_index(f"ix_staff_{column}", "staff", [column])
+
+    for column in LEAVE_INDEXES:
+        op.create_index(f"ix_leave_records_{column}", "leave_records", [column])
+
+    # Must match models.extra_field() exactly (literal JSON path) for
+    # SQLite to use them.
+    for name, key in EXTRA_DATA_KEYS.items():
+        op.create_index(
+            f"ix_staff_extra_{name}",
+            "staff",
+            [sa.text(f"json_extract(extra_data, '$.\"{key}\"')")],
+        )
+
+
+def downgrade():
+    for name in EXTRA_DATA_KEYS:
+        op.drop_index(f"ix_staff_extra_{name}", table_name="staff")
+
+    for column in LEAVE_INDEXES:
+        op.drop_index(f"ix_leave_records_{column}", table_name="leave_records")
+
+    for column in STAFF_INDEXES:
+        op.drop_index(f"ix_staff_{column}", table_name="staff")
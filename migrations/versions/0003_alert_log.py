@@ -0,0 +1,30 @@
+"""alert_log for due-date alert deduplication
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "alert_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("pf_no", sa.String(), sa.ForeignKey("staff.pf_no"), nullable=False),
+        sa.Column("due_field", sa.String(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("pf_no", "due_field", "due_date", name="uq_alert_log_item"),
+    )
+
+
+def downgrade():
+    op.drop_table("alert_log")
@@ -0,0 +1,35 @@
+"""staff_audit change log
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "staff_audit",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("pf_no", sa.String(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.Column("changed_by", sa.String()),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("field", sa.String()),
+        sa.Column("old_value", sa.String()),
+        sa.Column("new_value", sa.String()),
+    )
+    # History and as-of lookups are range scans on this index.
+    op.create_index("ix_staff_audit_pf_no_changed_at", "staff_audit", ["pf_no", "changed_at"])
+
+
+def downgrade():
+    op.drop_index("ix_staff_audit_pf_no_changed_at", table_name="staff_audit")
+    op.drop_table("staff_audit")
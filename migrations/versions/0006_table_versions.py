@@ -0,0 +1,37 @@
+"""table_versions: per-table write tokens shared by every worker
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+import time
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ("staff", "leave_records", "users", "alert_log", "staff_audit")
+
+
+def upgrade():
+    table_versions = op.create_table(
+        "table_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("modified", sa.Float(), nullable=False),
+    )
+    now = time.time()
+    op.bulk_insert(
+        table_versions,
+        [{"name": name, "token": uuid.uuid4().hex[:16], "modified": now} for name in TABLES],
+    )
+
+
+def downgrade():
+    op.drop_table("table_versions")
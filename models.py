@@ -1,15 +1,25 @@
-from sqlalchemy import Column, String, Date, JSON, Integer, ForeignKey
+from sqlalchemy import (
+    Column, String, Date, DateTime, Float, JSON, Integer, ForeignKey, Index, UniqueConstraint,
+    func, literal_column,
+)
 from sqlalchemy.orm import relationship
 from database import Base
 
 
+# Spreadsheet columns without a Staff field land in Staff.extra_data,
+# keyed by their upper-cased header. These keys have expression indexes
+# (migration 0002); the `extra.<KEY>=` filters on /staff and
+# /api/v1/staff go through extra_field() so SQLite uses them.
+EXTRA_DATA_INDEXED_KEYS = ("CATEGORY", "STATION", "SECTION")
+
+
 class Staff(Base):
     __tablename__ = "staff"
 
     pf_no = Column(String, primary_key=True, index=True)
 
     name = Column(String)
-    designation = Column(String)
+    designation = Column(String, index=True)
 
     date_of_joining = Column(Date)
     hrms_id = Column(String)
@@ -23,9 +33,9 @@ class Staff(Base):
 
     mobile = Column(String)
     email = Column(String)
-    cli_name = Column(String)
+    cli_name = Column(String, index=True)
 
-    bill_unit = Column(String)
+    bill_unit = Column(String, index=True)
     age = Column(String)
     dot = Column(String)
 
@@ -33,12 +43,12 @@ class Staff(Base):
     aadhar = Column(String)
 
     prom_trg = Column(String)
-    pme_due = Column(Date)
-    gr_sr_due = Column(Date)
-    tech_ref_due = Column(Date)
+    pme_due = Column(Date, index=True)
+    gr_sr_due = Column(Date, index=True)
+    tech_ref_due = Column(Date, index=True)
 
     gradation = Column(String)
-    date_of_gradation = Column(Date)
+    date_of_gradation = Column(Date, index=True)
     high_speed_psycho_date = Column(String)
 
     remarks = Column(String)
@@ -52,6 +62,33 @@ class Staff(Base):
     )
 
 
+def extra_field(key):
+    """
+    json_extract() over Staff.extra_data with the path inlined as a
+    literal: a bound parameter would not match the expression index.
+    """
+    path = '$."' + key.replace('"', "") + '"'
+    return func.json_extract(Staff.extra_data, literal_column("'" + path.replace("'", "''") + "'"))
+
+
+EXTRA_FILTER_PREFIX = "extra."
+
+
+def extra_filters(params):
+    """
+    Equality conditions for `extra.<KEY>=<value>` pairs (e.g. request
+    query params). Keys are upper-cased like the stored headers; values
+    match as text, so the CATEGORY/STATION/SECTION indexes apply. Empty
+    values (blank form fields) are ignored.
+    """
+    conditions = []
+    for name, value in params:
+        key = name[len(EXTRA_FILTER_PREFIX):].strip().upper()
+        if name.startswith(EXTRA_FILTER_PREFIX) and key and value:
+            conditions.append(extra_field(key) == value)
+    return conditions
+
+
 # =====================================================
 # ================= LEAVE TABLE =======================
 # =====================================================
@@ -61,10 +98,10 @@ class Leave(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    pf_no = Column(String, ForeignKey("staff.pf_no"))
+    pf_no = Column(String, ForeignKey("staff.pf_no"), index=True)
 
     leave_type = Column(String)
-    from_date = Column(Date)
+    from_date = Column(Date, index=True)
     to_date = Column(Date)
     days = Column(Integer)
     remarks = Column(String)
@@ -73,3 +110,89 @@ class Leave(Base):
         "Staff",
         back_populates="leaves"
     )
+
+
+# =====================================================
+# ================= USERS TABLE =======================
+# =====================================================
+
+class User(Base):
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    username = Column(String, unique=True, index=True, nullable=False)
+    password_hash = Column(String, nullable=False)
+
+    # Signed into session tokens; bumped to revoke them (auth.py)
+    session_generation = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+# =====================================================
+# ================= ALERT LOG =========================
+# =====================================================
+
+class AlertLog(Base):
+    """
+    One row per due-date alert already sent, so daily sweeps skip it.
+    Rows are written just before the send (and removed if it fails), so
+    sweeps in several workers never send the same item twice.
+    """
+    __tablename__ = "alert_log"
+    __table_args__ = (
+        UniqueConstraint("pf_no", "due_field", "due_date", name="uq_alert_log_item"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    pf_no = Column(String, ForeignKey("staff.pf_no"), nullable=False)
+    due_field = Column(String, nullable=False)
+    due_date = Column(Date, nullable=False)
+    sent_at = Column(DateTime, nullable=False)
+
+
+# =====================================================
+# ================= STAFF AUDIT =======================
+# =====================================================
+
+class StaffAudit(Base):
+    """
+    Append-only change log, one row per changed column (see audit.py).
+    Values are stored as text; creates and deletes are a single row with
+    no field. No foreign key: the history outlives the staff row.
+    """
+    __tablename__ = "staff_audit"
+    __table_args__ = (
+        Index("ix_staff_audit_pf_no_changed_at", "pf_no", "changed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    pf_no = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+    changed_by = Column(String)
+    action = Column(String, nullable=False)       # create / update / delete
+    field = Column(String)
+    old_value = Column(String)
+    new_value = Column(String)
+
+
+# =====================================================
+# ================= TABLE VERSIONS ====================
+# =====================================================
+
+class TableVersion(Base):
+    """
+    Random token replaced by every transaction that writes the table
+    (http_cache.py), so all workers agree on when a table last changed.
+    """
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    token = Column(String, nullable=False)
+    modified = Column(Float, nullable=False)
+
+
+# Every writer, not just the web app, must write staff_audit rows and
+# replace the tokens above; audit imports http_cache.
+import audit  # noqa: E402,F401
@@ -0,0 +1,306 @@
+# parallel_import.py
+#
+# Multi-workbook import: every sheet of every file (ZIP archives are
+# expanded) is parsed in a worker process into a columnar batch, PF Nos
+# are deduplicated across all inputs, and one writer stores the result.
+
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from audit import encode
+from database import SessionLocal
+from models import Staff
+
+SHEET_EXTENSIONS = (".xlsx", ".xls", ".csv")
+WRITE_BATCH = 500
+
+# Uncompressed limits for ZIP uploads (guards against zip bombs)
+MAX_MEMBER_BYTES = int(os.environ.get("HRMS_IMPORT_MAX_MEMBER_MB", "200")) * 1024 * 1024
+MAX_EXTRACT_BYTES = int(os.environ.get("HRMS_IMPORT_MAX_EXTRACT_MB", "1024")) * 1024 * 1024
+COPY_CHUNK = 1024 * 1024
+
+STAFF_FIELDS = [c.name for c in Staff.__table__.columns]
+
+
+# ------------------- INPUTS -------------------
+
+def _extract_member(archive, member, target, budget):
+    """
+    Stream one ZIP member to target. The size declared in the archive
+    can lie, so the bytes actually written are counted. Returns the
+    bytes written; raises ValueError past MAX_MEMBER_BYTES or `budget`.
+    """
+    limit = min(MAX_MEMBER_BYTES, budget)
+    if member.file_size > limit:
+        raise ValueError(f"{member.filename}: too large when uncompressed")
+
+    written = 0
+    with archive.open(member) as src, open(target, "wb") as dst:
+        while True:
+            block = src.read(COPY_CHUNK)
+            if not block:
+                break
+            written += len(block)
+            if written > limit:
+                raise ValueError(f"{member.filename}: too large when uncompressed")
+            dst.write(block)
+    return written
+
+
+def expand_inputs(paths, extract_dir):
+    """
+    Returns [(source_name, path)] sorted by source name. ZIP members are
+    extracted into extract_dir and named "<archive>/<member>".
+    """
+    sources = []
+    budget = MAX_EXTRACT_BYTES
+
+    for path in paths:
+        name = os.path.basename(path)
+
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.infolist():
+                    member_name = os.path.basename(member.filename)
+                    if member.is_dir() or not member_name.lower().endswith(SHEET_EXTENSIONS):
+                        continue
+                    # Flatten to the base name: no path traversal out of extract_dir.
+                    target = os.path.join(extract_dir, f"{len(sources)}_{member_name}")
+                    budget -= _extract_member(archive, member, target, budget)
+                    sources.append((f"{name}/{member.filename}", target))
+
+        elif name.lower().endswith(SHEET_EXTENSIONS):
+            sources.append((name, path))
+
+    return sorted(sources)
+
+
+# ------------------- WORKER -------------------
+
+def parse_workbook(source_name, path):
+    """
+    Runs in a worker process. Parses every sheet into
+    {"columns": {field: [values]}, "rows": [sheet row numbers]} batches.
+    A file that cannot be read gets "error" set and no sheets, so the
+    other files of the upload still import.
+    """
+    import pandas as pd
+    from data_quality import scan_import_frame
+    from excel_import import plain_value, prepare_frame, staff_record
+
+    started = time.perf_counter()
+
+    sheets = []
+    total_rows = 0
+    result = {
+        "source": source_name,
+        "sheets": sheets,
+        "rows": 0,
+        "parse_seconds": 0,
+        "error": None,
+    }
+
+    try:
+        if path.lower().endswith(".csv"):
+            frames = {"CSV": pd.read_csv(path)}
+        else:
+            frames = pd.read_excel(path, sheet_name=None)
+    except Exception as e:
+        result["error"] = f"Could not read file: {e}"
+        result["parse_seconds"] = time.perf_counter() - started
+        return result
+
+    for sheet_index, (sheet_name, df) in enumerate(frames.items()):
+        sheet = {
+            "sheet": sheet_name,
+            "sheet_index": sheet_index,
+            "columns": {field: [] for field in STAFF_FIELDS},
+            "rows": [],
+            "skipped_details": [],
+            "quality_issues": [],
+            "error": None,
+        }
+        sheets.append(sheet)
+
+        if df.empty:
+            continue
+        total_rows += len(df)
+
+        try:
+            extra_columns = prepare_frame(df)
+        except ValueError as e:
+            sheet["error"] = str(e)
+            continue
+
+        sheet["quality_issues"] = [
+            (row["pf_no"], row["field"], row["value"], row["issue"])
+            for row in scan_import_frame(df).to_dict("records")
+        ]
+
+        for idx, row in df.iterrows():
+            try:
+                record = staff_record(row, extra_columns)
+            except Exception as e:
+                sheet["skipped_details"].append((idx + 2, str(e)))
+                continue
+
+            if record is None:
+                sheet["skipped_details"].append((idx + 2, "Missing PF NO"))
+                continue
+
+            for field in STAFF_FIELDS:
+                sheet["columns"][field].append(plain_value(record.get(field)))
+            sheet["rows"].append(idx + 2)
+
+    result["rows"] = total_rows
+    result["parse_seconds"] = time.perf_counter() - started
+    return result
+
+
+# ------------------- DEDUPLICATION -------------------
+
+def merge_batches(results):
+    """
+    Deduplicate PF Nos across all files and sheets.
+
+    Rule: the last occurrence in (source name, sheet position, row) order
+    wins. Inputs are sorted by name, so the outcome does not depend on
+    which worker finished first. Returns (records by PF No, conflicts).
+    """
+    winners = {}
+    conflicts = []
+
+    for result in sorted(results, key=lambda r: r["source"]):
+        for sheet in result["sheets"]:
+            columns = sheet["columns"]
+            origin_sheet = (result["source"], sheet["sheet"])
+
+            for i, row_number in enumerate(sheet["rows"]):
+                record = {field: columns[field][i] for field in STAFF_FIELDS}
+                origin = (*origin_sheet, row_number)
+
+                previous = winners.get(record["pf_no"])
+                if previous:
+                    conflicts.append({
+                        "pf_no": record["pf_no"],
+                        "kept": origin,
+                        "dropped": previous[1],
+                    })
+                winners[record["pf_no"]] = (record, origin)
+
+    return {pf: record for pf, (record, _) in winners.items()}, conflicts
+
+
+# ------------------- WRITER -------------------
+
+def write_records(records):
+    """
+    Single writer: upsert in batches, one IN query per batch instead of
+    a SELECT per row. The audit rows of a batch go out in one INSERT at
+    its commit (audit.py). Returns (inserted, updated); rows identical to
+    the stored ones count as neither.
+    """
+    inserted = updated = 0
+    pf_nos = list(records)
+
+    db = SessionLocal()
+    try:
+        for start in range(0, len(pf_nos), WRITE_BATCH):
+            batch = pf_nos[start:start + WRITE_BATCH]
+            existing = {
+                s.pf_no: s
+                for s in db.query(Staff).filter(Staff.pf_no.in_(batch))
+            }
+
+            for pf in batch:
+                record = records[pf]
+                staff = existing.get(pf)
+                if staff is None:
+                    db.add(Staff(**record))
+                    inserted += 1
+                else:
+                    # Unchanged columns are left alone: no UPDATE, no audit row.
+                    # Compared as stored text, so a numeric mobile or a date
+                    # in a String column matches what is already there.
+                    changed = False
+                    for field, value in record.items():
+                        if encode(getattr(staff, field)) != encode(value):
+                            setattr(staff, field, value)
+                            changed = True
+                    updated += changed
+
+            db.commit()
+    finally:
+        db.close()
+
+    return inserted, updated
+
+
+# ------------------- ENTRY POINT -------------------
+
+def import_workbooks(paths, extract_dir, max_workers=None):
+    """
+    Import several workbooks / CSVs / ZIPs in one go.
+    Returns a summary dict for the result page.
+    """
+    started = time.perf_counter()
+    sources = expand_inputs(paths, extract_dir)
+
+    if len(sources) <= 1:
+        # Not worth spawning a pool for one file.
+        results = [parse_workbook(name, path) for name, path in sources]
+    else:
+        workers = max_workers or min(len(sources), os.cpu_count() or 1)
+        # spawn: never fork a process that holds DB connections and threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(parse_workbook, name, path) for name, path in sources]
+            results = [f.result() for f in futures]
+
+    parsed = time.perf_counter()
+
+    records, conflicts = merge_batches(results)
+    inserted, updated = write_records(records)
+
+    finished = time.perf_counter()
+
+    files = []
+    skipped_details = []
+    quality_issues = []
+    for result in results:
+        accepted = sum(len(sheet["rows"]) for sheet in result["sheets"])
+        seconds = result["parse_seconds"]
+        files.append({
+            "source": result["source"],
+            "sheets": len(result["sheets"]),
+            "rows": result["rows"],
+            "accepted": accepted,
+            "seconds": seconds,
+            "rows_per_second": result["rows"] / seconds if seconds else 0,
+            "error": result["error"],
+        })
+        if result["error"]:
+            skipped_details.append((result["source"], "-", result["error"]))
+        for sheet in result["sheets"]:
+            where = f"{result['source']} [{sheet['sheet']}]"
+            if sheet["error"]:
+                skipped_details.append((where, "-", sheet["error"]))
+            for row_number, reason in sheet["skipped_details"]:
+                skipped_details.append((where, row_number, reason))
+            for issue in sheet["quality_issues"]:
+                quality_issues.append((where, *issue))
+
+    return {
+        "files": files,
+        "inserted": inserted,
+        "updated": updated,
+        "conflicts": conflicts,
+        "skipped_details": skipped_details,
+        "quality_issues": quality_issues,
+        "parse_seconds": parsed - started,
+        "write_seconds": finished - parsed,
+        "total_seconds": finished - started,
+    }
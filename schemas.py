@@ -0,0 +1,116 @@
+# schemas.py
+
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+MAX_BULK = 1000
+
+
+# ================= STAFF =================
+
+class StaffFields(BaseModel):
+    name: Optional[str] = None
+    designation: Optional[str] = None
+
+    date_of_joining: Optional[date] = None
+    hrms_id: Optional[str] = None
+    community: Optional[str] = None
+
+    dob: Optional[date] = None
+    dor: Optional[date] = None
+
+    qualification: Optional[str] = None
+    mode_of_appointment: Optional[str] = None
+
+    mobile: Optional[str] = None
+    email: Optional[str] = None
+    cli_name: Optional[str] = None
+
+    bill_unit: Optional[str] = None
+    dot: Optional[str] = None
+
+    pan: Optional[str] = None
+    aadhar: Optional[str] = None
+
+    prom_trg: Optional[str] = None
+    pme_due: Optional[date] = None
+    gr_sr_due: Optional[date] = None
+    tech_ref_due: Optional[date] = None
+
+    gradation: Optional[str] = None
+    date_of_gradation: Optional[date] = None
+    high_speed_psycho_date: Optional[str] = None
+
+    remarks: Optional[str] = None
+
+
+class StaffIn(StaffFields):
+    pf_no: str = Field(..., min_length=1)
+
+
+class StaffUpdate(StaffFields):
+    """
+    Only the fields present in the request body are written.
+    """
+    pf_no: str = Field(..., min_length=1)
+
+
+class StaffOut(StaffIn):
+    model_config = ConfigDict(from_attributes=True)
+
+    age: Optional[str] = None
+    extra_data: Optional[dict] = None
+
+
+class BulkFetch(BaseModel):
+    pf_nos: List[str] = Field(..., max_length=MAX_BULK)
+    fields: Optional[List[str]] = None
+
+
+# ================= LEAVE =================
+
+class LeaveFields(BaseModel):
+    pf_no: Optional[str] = None
+    leave_type: Optional[str] = None
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    remarks: Optional[str] = None
+
+
+class LeaveIn(LeaveFields):
+    """
+    The date range is checked per item by the bulk endpoint, so one bad
+    range is reported in its errors instead of failing the whole batch.
+    """
+    pf_no: str = Field(..., min_length=1)
+    leave_type: str
+    from_date: date
+    to_date: date
+
+
+class LeaveOut(LeaveFields):
+    """
+    Whatever is stored, including rows the HTML form saved without the
+    range check: output must never reject data.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    days: Optional[int] = None
+
+
+# ================= RESULTS =================
+
+class BulkError(BaseModel):
+    index: int
+    pf_no: Optional[str] = None
+    error: str
+
+
+class BulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    errors: List[BulkError] = []
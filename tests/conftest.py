@@ -0,0 +1,44 @@
+# tests/conftest.py
+#
+# database.py opens sqlite:///./hrms.db relative to the working
+# directory, so the whole test session runs in a scratch directory,
+# entered before any app module is imported. Run from the repo root:
+#
+#   python -m pytest -q
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="hrms_tests_")
+os.chdir(WORKDIR)
+
+os.environ["HRMS_ALERTS"] = "0"
+os.environ["HRMS_SECRET_KEY"] = "test-secret"
+os.environ["HRMS_ADMIN_PASSWORD"] = "test-admin"
+os.environ["HRMS_ANALYTICS_DIR"] = os.path.join(WORKDIR, "analytics")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    import migrate
+
+    migrate.ensure_schema()
+    yield
+    os.chdir(ROOT)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    from database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
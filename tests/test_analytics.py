@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from analytics import LEAVE_TYPES, STAFF_TYPES, _write_parquet  # noqa: E402
+
+STAFF_ROW = ("P2", "A", "LP", "C", "B", date(2001, 1, 1), None, None, None, None, None)
+LEAVE_ROW = (2, "P2", "CL", date(2024, 1, 1), date(2024, 1, 2), 2)
+
+
+def all_null(types, first):
+    return [(first,) + (None,) * (len(types) - 1)]
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize("types, rows", [
+    (STAFF_TYPES, []),
+    (STAFF_TYPES, all_null(STAFF_TYPES, "P1")),
+    (STAFF_TYPES, [STAFF_ROW]),
+    (LEAVE_TYPES, []),
+    (LEAVE_TYPES, all_null(LEAVE_TYPES, 1)),
+    (LEAVE_TYPES, [LEAVE_ROW]),
+], ids=["staff-empty", "staff-null", "staff", "leave-empty", "leave-null", "leave"])
+def test_parquet_columns_carry_model_types(con, tmp_path, types, rows):
+    path = str(tmp_path / "part.parquet")
+    assert _write_parquet(con, rows, types, path) == len(rows)
+
+    described = {
+        name: column_type
+        for name, column_type, *_ in con.execute(f"DESCRIBE SELECT * FROM read_parquet('{path}')").fetchall()
+    }
+    assert described == types
+
+
+@pytest.mark.parametrize("types, null_first, row", [
+    (STAFF_TYPES, "P1", STAFF_ROW),
+    (LEAVE_TYPES, 1, LEAVE_ROW),
+], ids=["staff", "leave"])
+def test_parts_read_back_together(con, tmp_path, types, null_first, row):
+    paths = []
+    for i, rows in enumerate(([], all_null(types, null_first), [row])):
+        path = str(tmp_path / f"part-{i}.parquet")
+        _write_parquet(con, rows, types, path)
+        paths.append(path)
+
+    (count,) = con.execute(f"SELECT count(*) FROM read_parquet({paths!r})").fetchone()
+    assert count == 2
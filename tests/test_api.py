@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import auth
+import main
+
+
+@pytest.fixture(scope="module", autouse=True)
+def user():
+    auth.set_password("api-user", "secret")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        response = client.post("/api/v1/session", json={"username": "api-user", "password": "secret"})
+        assert response.status_code == 200
+        yield client
+
+
+def test_login_rejects_bad_password_then_throttles(monkeypatch):
+    monkeypatch.setattr(auth, "login_limiter", auth.LoginRateLimiter(max_failures=2))
+    with TestClient(main.app) as client:
+        body = {"username": "api-user", "password": "wrong"}
+        assert client.post("/api/v1/session", json=body).status_code == 401
+        assert client.post("/api/v1/session", json=body).status_code == 401
+
+        throttled = client.post("/api/v1/session", json=body)
+        assert throttled.status_code == 429
+        assert int(throttled.headers["retry-after"]) > 0
+
+        form = client.post("/login", data=body, follow_redirects=False)
+        assert form.status_code == 429
+
+
+def test_form_login_sets_session_cookie():
+    with TestClient(main.app) as client:
+        response = client.post(
+            "/login", data={"username": "api-user", "password": "secret"}, follow_redirects=False
+        )
+        assert response.status_code == 302
+        assert auth.verify_session(response.cookies[auth.SESSION_COOKIE]) == "api-user"
+
+
+def test_bulk_leave_reports_bad_items_individually(client):
+    created = client.post("/api/v1/staff/bulk", json=[{"pf_no": "L1", "name": "Leave Taker"}])
+    assert created.status_code == 200
+
+    response = client.post("/api/v1/leave/bulk", json=[
+        {"pf_no": "L1", "leave_type": "CL", "from_date": "2024-01-01", "to_date": "2024-01-02"},
+        {"pf_no": "L1", "leave_type": "CL", "from_date": "2024-02-05", "to_date": "2024-02-01"},
+        {"pf_no": "NOPE", "leave_type": "CL", "from_date": "2024-03-01", "to_date": "2024-03-01"},
+    ])
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 1
+    assert [(e["index"], e["error"]) for e in result["errors"]] == [
+        (1, "to_date is before from_date"),
+        (2, "Staff not found"),
+    ]
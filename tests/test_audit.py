@@ -0,0 +1,76 @@
+from datetime import date, datetime
+
+import audit
+from models import Staff
+
+
+def moment():
+    # changed_at has microsecond resolution; make "between" unambiguous
+    before = datetime.now()
+    while datetime.now() == before:
+        pass
+    return datetime.now()
+
+
+def test_state_as_of_walks_back_through_changes(db):
+    before_create = moment()
+    db.add(Staff(pf_no="A1", name="Original", designation="LP", dob=date(1980, 1, 2)))
+    db.commit()
+    after_create = moment()
+
+    staff = db.get(Staff, "A1")
+    staff.name = "Renamed"
+    staff.dob = date(1981, 3, 4)
+    db.commit()
+    after_update = moment()
+
+    db.delete(db.get(Staff, "A1"))
+    db.commit()
+    after_delete = moment()
+
+    assert audit.state_as_of(db, "A1", before_create) is None
+
+    created = audit.state_as_of(db, "A1", after_create)
+    assert created["name"] == "Original"
+    assert created["dob"] == date(1980, 1, 2)
+
+    updated = audit.state_as_of(db, "A1", after_update)
+    assert updated["name"] == "Renamed"
+    assert updated["dob"] == date(1981, 3, 4)
+    assert updated["designation"] == "LP"
+
+    assert audit.state_as_of(db, "A1", after_delete) is None
+
+
+def test_unchanged_assignment_writes_no_audit_row(db):
+    db.add(Staff(pf_no="A2", name="Same"))
+    db.commit()
+
+    db.get(Staff, "A2").name = "Same"
+    db.commit()
+
+    rows, cursor = audit.history(db, "A2")
+    assert [(r.action, r.field) for r in rows] == [("create", None)]
+    assert cursor is None
+
+
+def test_history_pages_newest_first(db):
+    db.add(Staff(pf_no="A3", name="v0"))
+    db.commit()
+    for i in range(1, 5):
+        db.get(Staff, "A3").name = f"v{i}"
+        db.commit()
+
+    first, cursor = audit.history(db, "A3", limit=3)
+    second, last = audit.history(db, "A3", before=cursor, limit=3)
+
+    assert [r.new_value for r in first] == ["v4", "v3", "v2"]
+    assert [r.new_value for r in second] == ["v1", None]
+    assert last is None
+
+
+def test_encode_matches_stored_text():
+    assert audit.encode(9876543210) == "9876543210"
+    assert audit.encode(date(2024, 1, 2)) == "2024-01-02"
+    assert audit.encode({"b": 1, "a": 2}) == audit.encode({"a": 2, "b": 1})
+    assert audit.encode(None) is None
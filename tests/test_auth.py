@@ -0,0 +1,165 @@
+import pytest
+
+import auth
+
+
+@pytest.fixture
+def user():
+    auth.set_password("alice", "secret")
+    auth._session_cache.clear()
+    return "alice"
+
+
+# ------------------- SESSION TOKENS -------------------
+
+def test_token_round_trip(user):
+    token = auth.create_session(user)
+    assert auth.verify_session(token) == user
+    # second call is served from the cache
+    assert auth.verify_session(token) == user
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "a.b.c", "a.b.c.d.e", "YWxpY2U.x.1.sig"])
+def test_malformed_tokens_are_rejected(token):
+    assert auth.verify_session(token) is None
+
+
+def test_tampered_token_is_rejected(user):
+    token = auth.create_session(user)
+    payload, signature = token.rsplit(".", 1)
+    user_part, generation, issued = payload.split(".")
+
+    flipped = "B" if signature[-1] == "A" else "A"
+    assert auth.verify_session(f"{payload}.{signature[:-1]}{flipped}") is None
+    forged = f"{auth._b64(b'admin')}.{generation}.{issued}"
+    assert auth.verify_session(f"{forged}.{signature}") is None
+    assert auth._parse_token(f"{user_part}.{generation}.{int(issued) + 1}.{signature}") is None
+
+
+def test_expired_token_is_rejected(user, monkeypatch):
+    token = auth.create_session(user)
+    monkeypatch.setattr(auth, "SESSION_MAX_AGE", 0)
+    assert auth.verify_session(token) is None
+
+
+def test_unknown_user_is_rejected():
+    payload = f"{auth._b64(b'nobody')}.0.{int(auth.time.time())}"
+    assert auth.verify_session(f"{payload}.{auth._sign(payload)}") is None
+
+
+def test_logout_revokes_copies(user):
+    token = auth.create_session(user)
+    copy = str(token)
+    assert auth.verify_session(copy) == user
+
+    auth.end_session(token)
+    assert auth.verify_session(copy) is None
+    assert auth.verify_session(auth.create_session(user)) == user
+
+
+def test_password_change_revokes_sessions(user):
+    token = auth.create_session(user)
+    auth.set_password(user, "changed")
+    assert auth.verify_session(token) is None
+
+
+def test_generation_cache_expires(user, monkeypatch):
+    token = auth.create_session(user)
+    assert auth.verify_session(token) == user
+
+    # Revoked by another process: only the database changes.
+    from database import SessionLocal
+    from models import User
+
+    db = SessionLocal()
+    db.query(User).filter(User.username == user).update(
+        {User.session_generation: User.session_generation + 1}
+    )
+    db.commit()
+    db.close()
+
+    assert auth.verify_session(token) == user          # still cached
+    auth._generations[user] = (auth._generations[user][0], 0)
+    assert auth.verify_session(token) is None
+
+
+def test_authenticate(user):
+    assert auth.authenticate(user, "secret") == user
+    assert auth.authenticate(user, "wrong") is None
+    assert auth.authenticate("nobody", "secret") is None
+
+
+# ------------------- RATE LIMITER -------------------
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    return clock
+
+
+def test_limiter_blocks_after_max_failures(clock):
+    limiter = auth.LoginRateLimiter(max_failures=3, max_client_failures=10, window=60)
+    key = ("1.2.3.4", "alice")
+
+    for _ in range(2):
+        limiter.record_failure(key)
+    assert limiter.retry_after(key) == 0
+
+    limiter.record_failure(key)
+    assert 0 < limiter.retry_after(key) <= 61
+    assert limiter.retry_after(("1.2.3.4", "bob")) == 0
+    assert limiter.retry_after(("5.6.7.8", "alice")) == 0
+
+    clock.now += 61
+    assert limiter.retry_after(key) == 0
+
+
+def test_limiter_throttles_username_cycling(clock):
+    limiter = auth.LoginRateLimiter(max_failures=3, max_client_failures=5, window=60)
+
+    for i in range(5):
+        limiter.record_failure(("1.2.3.4", f"user{i}"))
+
+    assert limiter.retry_after(("1.2.3.4", "fresh")) > 0
+    assert limiter.retry_after(("5.6.7.8", "fresh")) == 0
+
+
+def test_limiter_reset_keeps_client_failures(clock):
+    limiter = auth.LoginRateLimiter(max_failures=2, max_client_failures=3, window=60)
+    limiter.record_failure(("1.2.3.4", "alice"))
+    limiter.record_failure(("1.2.3.4", "alice"))
+    limiter.record_failure(("1.2.3.4", "bob"))
+
+    limiter.reset(("1.2.3.4", "alice"))
+    assert limiter.retry_after(("1.2.3.4", "carol")) > 0
+
+
+def test_limiter_caps_tracked_keys(clock):
+    limiter = auth.LoginRateLimiter(max_keys=50, window=60)
+
+    for i in range(200):
+        clock.now += 0.01
+        limiter.record_failure((f"10.0.0.{i}", "alice"))
+
+    assert len(limiter._failures) <= 50
+    # the newest keys survive
+    assert ("10.0.0.199", "alice") in limiter._failures
+
+
+def test_limiter_evicts_expired_keys(clock):
+    limiter = auth.LoginRateLimiter(window=60)
+    for i in range(10):
+        limiter.record_failure((f"10.0.0.{i}", "alice"))
+
+    clock.now += 120
+    limiter.record_failure(("10.0.1.1", "alice"))
+    assert set(limiter._failures) == {("10.0.1.1", "alice"), ("10.0.1.1",)}
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from data_quality import invalid_flags, normalize, scan_import_frame
+
+
+def is_valid(field, value):
+    frame = pd.DataFrame({field: normalize(field, pd.Series([value]))})
+    return not invalid_flags(frame)[f"{field}_invalid"].iloc[0]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("pan", "ABCDE1234F"),
+    ("pan", " abcde1234f "),
+    ("aadhar", "2345 6789 0123"),
+    ("aadhar", "234567890123.0"),
+    ("mobile", "9876543210"),
+    ("mobile", "+91 98765-43210"),
+    ("mobile", "09876543210"),
+    ("mobile", 9876543210.0),
+    ("email", "Clerk@Railnet.Gov.In"),
+    ("hrms_id", "abcdef"),
+])
+def test_valid_values(field, value):
+    assert is_valid(field, value)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("pan", "ABCD1234F"),
+    ("pan", "ABCDE12345"),
+    ("aadhar", "123456789012"),          # cannot start with 0 or 1
+    ("aadhar", "23456789012"),
+    ("mobile", "5876543210"),            # must start with 6-9
+    ("mobile", "98765432"),
+    ("email", "clerk@railnet"),
+    ("email", "two@@signs.in"),
+    ("hrms_id", "ABC123"),
+])
+def test_invalid_values(field, value):
+    assert not is_valid(field, value)
+
+
+def test_empty_values_are_not_flagged():
+    assert is_valid("pan", "")
+    assert is_valid("mobile", None)
+
+
+def test_duplicates_compare_normalized_values():
+    sheet = pd.DataFrame({
+        "PF NO": ["P1", "P2", "P3"],
+        "MOBILE": ["9876543210", "+91 98765 43210", "9123456780"],
+        "PAN": ["abcde1234f", "ABCDE1234F", None],
+    })
+    issues = scan_import_frame(sheet)
+
+    duplicates = issues[issues["issue"].str.startswith("Duplicate")]
+    assert sorted(zip(duplicates["field"], duplicates["pf_no"])) == [
+        ("mobile", "P1"), ("mobile", "P2"), ("pan", "P1"), ("pan", "P2"),
+    ]
+    assert (issues["issue"] == "Invalid format").sum() == 0
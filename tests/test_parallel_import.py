@@ -0,0 +1,97 @@
+from datetime import date
+
+import parallel_import
+from parallel_import import STAFF_FIELDS, merge_batches, write_records
+
+
+def record(pf_no, **values):
+    row = {field: None for field in STAFF_FIELDS}
+    row.update(pf_no=pf_no, **values)
+    return row
+
+
+def result(source, *sheets):
+    """
+    parse_workbook() output for sheets given as (name, [(row number, record)]).
+    """
+    batches = []
+    for index, (name, rows) in enumerate(sheets):
+        batches.append({
+            "sheet": name,
+            "sheet_index": index,
+            "columns": {f: [r[f] for _, r in rows] for f in STAFF_FIELDS},
+            "rows": [n for n, _ in rows],
+            "skipped_details": [],
+            "quality_issues": [],
+            "error": None,
+        })
+    return {"source": source, "sheets": batches, "rows": 0, "parse_seconds": 0, "error": None}
+
+
+# ------------------- DEDUPLICATION -------------------
+
+def test_last_occurrence_wins_in_source_order():
+    first = result("a.xlsx", ("Sheet1", [(2, record("P1", name="a-2")), (3, record("P1", name="a-3"))]))
+    second = result("b.xlsx", ("Sheet1", [(2, record("P1", name="b-2"))]))
+
+    # Worker completion order must not matter.
+    for results in ([first, second], [second, first]):
+        records, conflicts = merge_batches(results)
+        assert records["P1"]["name"] == "b-2"
+        assert conflicts == [
+            {"pf_no": "P1", "kept": ("a.xlsx", "Sheet1", 3), "dropped": ("a.xlsx", "Sheet1", 2)},
+            {"pf_no": "P1", "kept": ("b.xlsx", "Sheet1", 2), "dropped": ("a.xlsx", "Sheet1", 3)},
+        ]
+
+
+def test_later_sheet_wins_within_a_file():
+    workbook = result(
+        "a.xlsx",
+        ("Zeta", [(5, record("P1", name="first sheet"))]),
+        ("Alpha", [(2, record("P1", name="second sheet"))]),
+    )
+    records, conflicts = merge_batches([workbook])
+    assert records["P1"]["name"] == "second sheet"
+    assert conflicts[0]["kept"] == ("a.xlsx", "Alpha", 2)
+
+
+def test_distinct_pf_nos_do_not_conflict():
+    records, conflicts = merge_batches([
+        result("a.xlsx", ("S", [(2, record("P1")), (3, record("P2"))])),
+        result("b.xlsx", ("S", [(2, record("P3"))])),
+    ])
+    assert sorted(records) == ["P1", "P2", "P3"]
+    assert conflicts == []
+
+
+def test_unreadable_file_is_reported_not_raised(tmp_path):
+    path = tmp_path / "bad.xlsx"
+    path.write_bytes(b"not a workbook")
+
+    parsed = parallel_import.parse_workbook("bad.xlsx", str(path))
+    assert parsed["sheets"] == []
+    assert parsed["error"].startswith("Could not read file")
+
+
+# ------------------- WRITER -------------------
+
+def test_reimport_of_unchanged_rows_writes_nothing(db):
+    from models import StaffAudit
+
+    row = record(
+        "W1",
+        name="Writer",
+        mobile=9876543210,
+        aadhar=234567890123.0,
+        high_speed_psycho_date=date(2024, 1, 2),
+        dob=date(1990, 5, 6),
+        extra_data={"STATION": "MAS"},
+    )
+    assert write_records({"W1": dict(row)}) == (1, 0)
+    assert write_records({"W1": dict(row)}) == (0, 0)
+
+    row["mobile"] = 9123456780
+    assert write_records({"W1": dict(row)}) == (0, 1)
+
+    changes = db.query(StaffAudit.action, StaffAudit.field).filter(StaffAudit.pf_no == "W1").all()
+    assert changes == [("create", None), ("update", "mobile")]